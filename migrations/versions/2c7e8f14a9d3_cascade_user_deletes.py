@@ -0,0 +1,67 @@
+"""cascade user deletes
+
+Revision ID: 2c7e8f14a9d3
+Revises: 9d4f1a7c2e58
+Create Date: 2026-10-18 19:34:12.518047
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c7e8f14a9d3'
+down_revision: Union[str, None] = '9d4f1a7c2e58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SQLITE_FTS_TRIGGERS = (
+    """CREATE TRIGGER transactions_fts_insert AFTER INSERT ON transactions BEGIN
+        INSERT INTO transactions_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER transactions_fts_delete AFTER DELETE ON transactions BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER transactions_fts_update AFTER UPDATE ON transactions BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO transactions_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+)
+# the foreign key was created unnamed, which on SQLite leaves it without a name
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+FOREIGN_KEY = {'postgresql': 'transactions_user_id_fkey'}
+
+
+def _replace_foreign_key(ondelete):
+    dialect_name = op.get_bind().dialect.name
+    name = FOREIGN_KEY.get(dialect_name, 'fk_transactions_user_id_users')
+    with op.batch_alter_table(
+        'transactions', naming_convention=NAMING_CONVENTION
+    ) as batch_op:
+        batch_op.drop_constraint(name, type_='foreignkey')
+        batch_op.create_foreign_key(
+            name, 'users', ['user_id'], ['id'], ondelete=ondelete
+        )
+    # SQLite recreates the table, which drops the triggers feeding the search table
+    if dialect_name == 'sqlite':
+        for statement in SQLITE_FTS_TRIGGERS:
+            op.execute(statement)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    _replace_foreign_key('CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _replace_foreign_key(None)
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('deleted_at')
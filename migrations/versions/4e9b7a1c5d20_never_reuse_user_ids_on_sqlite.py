@@ -0,0 +1,39 @@
+"""never reuse user ids on sqlite
+
+Revision ID: 4e9b7a1c5d20
+Revises: 2c7e8f14a9d3
+Create Date: 2026-10-18 21:12:45.803316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e9b7a1c5d20'
+down_revision: Union[str, None] = '2c7e8f14a9d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _recreate_users(autoincrement):
+    # only SQLite reuses ids, postgres sequences never go back
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table(
+        'users',
+        recreate='always',
+        table_kwargs={'sqlite_autoincrement': autoincrement},
+    ):
+        pass
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _recreate_users(True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _recreate_users(False)
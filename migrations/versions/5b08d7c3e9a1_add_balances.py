@@ -0,0 +1,41 @@
+"""add balances
+
+Revision ID: 5b08d7c3e9a1
+Revises: e1a6b2f09c35
+Create Date: 2026-10-18 18:21:10.442871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b08d7c3e9a1'
+down_revision: Union[str, None] = 'e1a6b2f09c35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('balances',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('state', sa.String(), nullable=False),
+    sa.Column('balance', sa.Float(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'state')
+    )
+    op.execute(
+        """INSERT INTO balances (user_id, state, balance, count)
+        SELECT user_id, state, sum(value), count(*)
+        FROM transactions
+        GROUP BY user_id, state"""
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('balances')
@@ -0,0 +1,74 @@
+"""store money as integer cents
+
+Revision ID: 9d4f1a7c2e58
+Revises: 5b08d7c3e9a1
+Create Date: 2026-10-18 18:47:31.205964
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4f1a7c2e58'
+down_revision: Union[str, None] = '5b08d7c3e9a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SQLITE_FTS_TRIGGERS = (
+    """CREATE TRIGGER transactions_fts_insert AFTER INSERT ON transactions BEGIN
+        INSERT INTO transactions_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER transactions_fts_delete AFTER DELETE ON transactions BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER transactions_fts_update AFTER UPDATE ON transactions BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO transactions_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+)
+MONEY_COLUMNS = {
+    'transactions': ('value',),
+    'transaction_rollups': ('total', 'income', 'expense'),
+    'balances': ('balance',),
+}
+
+
+def _convert(type_, expression):
+    dialect_name = op.get_bind().dialect.name
+    for table, columns in MONEY_COLUMNS.items():
+        if dialect_name == 'sqlite':
+            # SQLite stores whatever it is given, the values are rescaled in
+            # place and the recreated table casts them to the new type
+            for column in columns:
+                op.execute(
+                    f'UPDATE {table} SET {column} = {expression.format(column)}'
+                )
+        with op.batch_alter_table(table) as batch_op:
+            for column in columns:
+                batch_op.alter_column(
+                    column,
+                    type_=type_,
+                    existing_nullable=False,
+                    postgresql_using=expression.format(column),
+                )
+        # recreating transactions drops the triggers feeding the search table
+        if dialect_name == 'sqlite' and table == 'transactions':
+            for statement in SQLITE_FTS_TRIGGERS:
+                op.execute(statement)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _convert(sa.BigInteger(), 'CAST(round({} * 100) AS BIGINT)')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _convert(sa.Float(), '{} / 100.0')
@@ -0,0 +1,79 @@
+"""add transactions search indexes
+
+Revision ID: c7d93e15a4f0
+Revises: 8c41e0b5d2a7
+Create Date: 2026-10-18 17:41:02.318506
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d93e15a4f0'
+down_revision: Union[str, None] = '8c41e0b5d2a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index(
+            'ix_transactions_title_trgm',
+            'transactions',
+            ['title'],
+            postgresql_using='gin',
+            postgresql_ops={'title': 'gin_trgm_ops'},
+        )
+        op.create_index(
+            'ix_transactions_description_trgm',
+            'transactions',
+            ['description'],
+            postgresql_using='gin',
+            postgresql_ops={'description': 'gin_trgm_ops'},
+        )
+    elif dialect_name == 'sqlite':
+        op.execute(
+            """CREATE VIRTUAL TABLE transactions_fts USING fts5(
+                title, description, content='transactions', content_rowid='id',
+                tokenize='trigram'
+            )"""
+        )
+        op.execute(
+            """CREATE TRIGGER transactions_fts_insert AFTER INSERT ON transactions BEGIN
+                INSERT INTO transactions_fts(rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END"""
+        )
+        op.execute(
+            """CREATE TRIGGER transactions_fts_delete AFTER DELETE ON transactions BEGIN
+                INSERT INTO transactions_fts(transactions_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+            END"""
+        )
+        op.execute(
+            """CREATE TRIGGER transactions_fts_update AFTER UPDATE ON transactions BEGIN
+                INSERT INTO transactions_fts(transactions_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+                INSERT INTO transactions_fts(rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END"""
+        )
+        op.execute("INSERT INTO transactions_fts(transactions_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == 'postgresql':
+        op.drop_index('ix_transactions_description_trgm', table_name='transactions')
+        op.drop_index('ix_transactions_title_trgm', table_name='transactions')
+    elif dialect_name == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS transactions_fts_update')
+        op.execute('DROP TRIGGER IF EXISTS transactions_fts_delete')
+        op.execute('DROP TRIGGER IF EXISTS transactions_fts_insert')
+        op.execute('DROP TABLE IF EXISTS transactions_fts')
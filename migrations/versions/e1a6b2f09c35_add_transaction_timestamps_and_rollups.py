@@ -0,0 +1,113 @@
+"""add transaction timestamps and rollups
+
+Revision ID: e1a6b2f09c35
+Revises: c7d93e15a4f0
+Create Date: 2026-10-18 18:02:44.907113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a6b2f09c35'
+down_revision: Union[str, None] = 'c7d93e15a4f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SQLITE_FTS_TRIGGERS = (
+    """CREATE TRIGGER transactions_fts_insert AFTER INSERT ON transactions BEGIN
+        INSERT INTO transactions_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER transactions_fts_delete AFTER DELETE ON transactions BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER transactions_fts_update AFTER UPDATE ON transactions BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO transactions_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+)
+BUCKETS = {
+    'postgresql': {
+        'day': 'CAST(occurred_at AS DATE)',
+        'month': "CAST(date_trunc('month', occurred_at) AS DATE)",
+    },
+    'sqlite': {
+        'day': 'date(occurred_at)',
+        'month': "date(occurred_at, 'start of month')",
+    },
+}
+
+
+def _alter_transactions(dialect_name, alter):
+    # SQLite can't add columns with a CURRENT_TIMESTAMP default, the table is
+    # recreated instead, which drops the triggers feeding the search table
+    recreate = 'always' if dialect_name == 'sqlite' else 'auto'
+    with op.batch_alter_table('transactions', recreate=recreate) as batch_op:
+        alter(batch_op)
+    if dialect_name == 'sqlite':
+        for statement in SQLITE_FTS_TRIGGERS:
+            op.execute(statement)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect_name = op.get_bind().dialect.name
+
+    def add_columns(batch_op):
+        batch_op.add_column(
+            sa.Column(
+                'occurred_at',
+                sa.DateTime(),
+                server_default=sa.func.now(),
+                nullable=False,
+            )
+        )
+        batch_op.add_column(
+            sa.Column(
+                'created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False
+            )
+        )
+
+    _alter_transactions(dialect_name, add_columns)
+
+    op.create_table('transaction_rollups',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.String(), nullable=False),
+    sa.Column('bucket', sa.Date(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('income', sa.Float(), nullable=False),
+    sa.Column('expense', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'period', 'bucket')
+    )
+
+    for period, bucket in BUCKETS.get(dialect_name, {}).items():
+        op.execute(
+            f"""INSERT INTO transaction_rollups
+                (user_id, period, bucket, count, total, income, expense)
+            SELECT user_id, '{period}', {bucket}, count(*), sum(value),
+                sum(CASE WHEN value > 0 THEN value ELSE 0 END),
+                sum(CASE WHEN value > 0 THEN 0 ELSE value END)
+            FROM transactions
+            GROUP BY user_id, {bucket}"""
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect_name = op.get_bind().dialect.name
+    op.drop_table('transaction_rollups')
+
+    def drop_columns(batch_op):
+        batch_op.drop_column('created_at')
+        batch_op.drop_column('occurred_at')
+
+    _alter_transactions(dialect_name, drop_columns)
@@ -0,0 +1,67 @@
+import asyncio
+
+from loguru import logger
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.controllers import database
+from src.app.models.models import Balance, Transaction, User
+
+
+async def count_transactions(session: AsyncSession, user_id: int) -> int:
+    # the running balances already hold the count, no need to scan transactions
+    count = await session.scalar(
+        select(func.sum(Balance.count)).where(Balance.user_id == user_id)
+    )
+    return count or 0
+
+
+async def purge_user(user_id: int, batch_size: int):
+    """Deletes the user's transactions in batches, each in its own short
+    transaction, and then the user, whose rollups and balances go with it.
+
+    Used for accounts too large to delete within a request: locks are held for
+    one batch at a time and the work can't time out the client.
+    """
+    batch = (
+        select(Transaction.id)
+        .where(Transaction.user_id == user_id)
+        .order_by(Transaction.id)
+        .limit(batch_size)
+    )
+    try:
+        async with database.async_session() as session:
+            while True:
+                deleted = await session.execute(
+                    delete(Transaction)
+                    .where(Transaction.id.in_(batch))
+                    .execution_options(synchronize_session=False)
+                )
+                await session.commit()
+                if deleted.rowcount < batch_size:
+                    break
+            await session.execute(delete(User).where(User.id == user_id))
+            await session.commit()
+    except Exception:
+        logger.exception(f'Purge of user {user_id} failed')
+
+
+async def purge_deleted_users(batch_size: int):
+    """Purges every user still marked deleted, resuming purges that failed or
+    were cut short by a restart."""
+    async with database.async_session() as session:
+        user_ids = (
+            await session.scalars(select(User.id).where(User.deleted_at.is_not(None)))
+        ).all()
+    for user_id in user_ids:
+        await purge_user(user_id, batch_size)
+
+
+async def sweep_deleted_users(interval: float, batch_size: int):
+    """Runs ``purge_deleted_users`` every ``interval`` seconds, for the app lifespan."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await purge_deleted_users(batch_size)
+        except Exception:
+            logger.exception('Sweep of deleted users failed')
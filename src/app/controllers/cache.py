@@ -0,0 +1,95 @@
+import time
+from collections import OrderedDict
+from typing import Any, Protocol
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from src.app.models.models import User
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> Any | None: ...
+
+    def set(self, key: str, value: Any) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class LocalCache:
+    """In-process cache with a bounded size (LRU) and a time to live per entry."""
+
+    def __init__(self, maxsize: int, ttl: float, timer=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= self.timer():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any):
+        self._entries[key] = (self.timer() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class PrincipalCache:
+    """Caches the column values of authenticated users, keyed by token subject.
+
+    Values are plain dicts so any backend able to store them can be plugged in.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, subject: str) -> User | None:
+        data = self.backend.get(subject)
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+
+        user = User(
+            username=data['username'], email=data['email'], password=data['password']
+        )
+        for key, value in data.items():
+            setattr(user, key, value)
+        make_transient_to_detached(user)
+        return user
+
+    def set(self, subject: str, user: User):
+        self.backend.set(
+            subject,
+            {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs},
+        )
+
+    def invalidate(self, subject: str):
+        self.backend.delete(subject)
+
+    def clear(self):
+        self.backend.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,70 @@
+from collections.abc import Iterable
+from dataclasses import dataclass
+from decimal import ROUND_HALF_EVEN, Decimal
+from functools import lru_cache
+
+# symbol and minor unit digits per ISO 4217 code
+CURRENCIES = {
+    'BRL': ('R$', 2),
+    'USD': ('$', 2),
+    'EUR': ('€', 2),
+    'JPY': ('¥', 0),
+}
+# decimal point, thousands separator and symbol placement per locale
+LOCALES = {
+    'en_US': ('.', ',', '{symbol}{amount}'),
+    'pt_BR': (',', '.', '{symbol} {amount}'),
+    'de_DE': (',', '.', '{amount} {symbol}'),
+}
+
+
+@dataclass(frozen=True)
+class CurrencyFormat:
+    """Precompiled formatting rules for one currency in one locale.
+
+    Unlike ``locale.currency`` nothing here touches process-wide state, so a
+    format can be shared by every request and thread.
+    """
+
+    quantum: Decimal
+    spec: str
+    separators: dict[int, int]
+    pattern: str
+    symbol: str
+
+    def __call__(self, value, symbol: bool = False) -> str:
+        amount = Decimal(str(value) if isinstance(value, float) else value)
+        amount = amount.quantize(self.quantum, rounding=ROUND_HALF_EVEN)
+        text = format(abs(amount), self.spec).translate(self.separators)
+        if symbol:
+            text = self.pattern.format(symbol=self.symbol, amount=text)
+        return f'-{text}' if amount < 0 else text
+
+
+@lru_cache(maxsize=None)
+def get_format(currency: str = 'BRL', locale: str = 'en_US') -> CurrencyFormat:
+    try:
+        symbol, digits = CURRENCIES[currency]
+        decimal_point, thousands, pattern = LOCALES[locale]
+    except KeyError as error:
+        raise ValueError(f'Unsupported currency format: {error.args[0]}') from None
+    return CurrencyFormat(
+        quantum=Decimal(1).scaleb(-digits),
+        spec=f',.{digits}f',
+        separators=str.maketrans({',': thousands, '.': decimal_point}),
+        pattern=pattern,
+        symbol=symbol,
+    )
+
+
+def format_currency(
+    value, currency: str = 'BRL', locale: str = 'en_US', symbol: bool = False
+) -> str:
+    return get_format(currency, locale)(value, symbol)
+
+
+def format_currencies(
+    values: Iterable, currency: str = 'BRL', locale: str = 'en_US', symbol: bool = False
+) -> list[str]:
+    formatter = get_format(currency, locale)
+    return [formatter(value, symbol) for value in values]
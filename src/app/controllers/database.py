@@ -1,10 +1,139 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import time
+
+from fastapi import Depends, Request, Response
+from sqlalchemy import exc, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from src.app.controllers.settings import Settings
 
-engine = create_async_engine(Settings().DATABASE_URL)
+READ_PRIMARY_COOKIE = 'read_primary_until'
+SAFE_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+
+class PoolMetrics:
+    """Counts checkouts and how long they waited for a free connection."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float, timed_out: bool = False):
+        self.checkouts += not timed_out
+        self.timeouts += timed_out
+        self.wait_time += wait
+        self.max_wait = max(self.max_wait, wait)
+
+
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - start)
+        return connection
+
+
+def engine_options(settings: Settings, url: str | None = None) -> dict:
+    options = {
+        'pool_pre_ping': settings.DB_POOL_PRE_PING,
+        'pool_recycle': settings.DB_POOL_RECYCLE,
+    }
+    # SQLite picks its own pool, sizing only applies to server databases
+    if make_url(url or settings.DATABASE_URL).get_backend_name() != 'sqlite':
+        options.update(
+            poolclass=MeteredQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    return options
+
+
+def pool_status(engine: AsyncEngine) -> dict | None:
+    pool = engine.sync_engine.pool
+    if not isinstance(pool, MeteredQueuePool):
+        return None
+    metrics = pool.metrics
+    return {
+        'size': pool.size(),
+        'checked_out': pool.checkedout(),
+        'overflow': max(pool.overflow(), 0),
+        'checkouts': metrics.checkouts,
+        'timeouts': metrics.timeouts,
+        'wait_time': metrics.wait_time,
+        'max_wait': metrics.max_wait,
+    }
+
+
+settings = Settings()
+engine = create_async_engine(settings.DATABASE_URL, **engine_options(settings))
+async_session = async_sessionmaker(engine, expire_on_commit=False)
+replica_session = (
+    async_sessionmaker(
+        create_async_engine(
+            settings.DATABASE_REPLICA_URL,
+            **engine_options(settings, settings.DATABASE_REPLICA_URL),
+        ),
+        expire_on_commit=False,
+    )
+    if settings.DATABASE_REPLICA_URL
+    else None
+)
 
 
 async def get_session():
-    async with AsyncSession(engine, expire_on_commit=False) as session:
+    async with async_session() as session:
+        yield session
+
+
+def read_your_writes(request: Request, response: Response):
+    """Pins a client to the primary for a while after it sends a mutating request.
+
+    Replicas lag behind the primary, without this a client could miss its own
+    writes on the next read.
+    """
+    if replica_session is not None and request.method not in SAFE_METHODS:
+        response.set_cookie(
+            READ_PRIMARY_COOKIE,
+            str(time.time() + settings.READ_YOUR_WRITES_SECONDS),
+            max_age=settings.READ_YOUR_WRITES_SECONDS,
+            httponly=True,
+        )
+
+
+def _reads_from_primary(request: Request):
+    try:
+        return float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+async def get_read_session(
+    request: Request, session: AsyncSession = Depends(get_session)
+):
+    """Session for read-only handlers, on the replica when one is configured."""
+    if replica_session is None or _reads_from_primary(request):
         yield session
+        return
+    async with replica_session() as replica:
+        yield replica
@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+from decimal import Decimal
+from functools import partial
+
+from sqlalchemy import select
+
+from src.app.controllers import database
+from src.app.controllers.currency import format_currencies
+from src.app.models.models import Transaction
+
+EXPORT_COLUMNS = ('id', 'title', 'description', 'state', 'value', 'occurred_at')
+MEDIA_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+VALUE = EXPORT_COLUMNS.index('value')
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    return value.isoformat()
+
+
+def _ndjson_chunk(rows):
+    return ''.join(
+        json.dumps(
+            dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False, default=_json_default
+        )
+        + '\n'
+        for row in rows
+    )
+
+
+def _csv_chunk(rows, currency=None, locale=None):
+    if locale is not None:
+        values = format_currencies((row[VALUE] for row in rows), currency, locale)
+        rows = [
+            (*row[:VALUE], value, *row[VALUE + 1 :]) for row, value in zip(rows, values)
+        ]
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+async def export_transactions(
+    user_id: int,
+    format: str,
+    batch_size: int,
+    currency: str = 'BRL',
+    locale: str | None = None,
+):
+    """Streams every transaction of the user, one encoded chunk per batch of rows.
+
+    Rows come from a server side cursor, so memory depends on the batch size only.
+    With a locale, CSV values are written as formatted amounts for spreadsheets.
+    """
+    if format == 'csv':
+        encode = partial(_csv_chunk, currency=currency, locale=locale)
+    else:
+        encode = _ndjson_chunk
+    if format == 'csv':
+        yield _csv_chunk([EXPORT_COLUMNS])
+
+    query = (
+        select(*(getattr(Transaction, column) for column in EXPORT_COLUMNS))
+        .where(Transaction.user_id == user_id)
+        .order_by(Transaction.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async with database.async_session() as session:
+        result = await session.stream(query)
+        async for rows in result.partitions():
+            yield encode(rows)
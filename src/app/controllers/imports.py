@@ -0,0 +1,261 @@
+import csv
+import os
+import re
+import tempfile
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import AsyncIterable, Callable, Iterable
+from uuid import uuid4
+
+from loguru import logger
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.controllers import database
+from src.app.controllers.cache import LocalCache
+from src.app.controllers.reports import track_transactions
+from src.app.models.models import Transaction, utcnow
+from src.app.models.schemas import StatementImport, TransactionSchema
+
+CHUNK_SIZE = 64 * 1024
+OFX_TOKEN = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+OFX_DATETIME = re.compile(r'\d*')
+OFX_OFFSET = re.compile(r'\[([+-]?\d+(?:\.\d+)?)')
+OFX_DATETIME_FORMATS = {8: '%Y%m%d', 12: '%Y%m%d%H%M', 14: '%Y%m%d%H%M%S'}
+OFX_FIELDS = {
+    'NAME': 'title',
+    'MEMO': 'description',
+    'TRNTYPE': 'state',
+    'TRNAMT': 'value',
+    'DTPOSTED': 'occurred_at',
+}
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]):
+    """Splits a byte stream into lines without buffering the whole body."""
+    pending = b''
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b'\n')
+        for line in lines:
+            yield line
+    yield pending
+
+
+async def _aiter(rows: Iterable | AsyncIterable):
+    if isinstance(rows, AsyncIterable):
+        async for row in rows:
+            yield row
+    else:
+        for row in rows:
+            yield row
+
+
+async def _insert_batch(session: AsyncSession, batch: list[dict]):
+    ids = await session.scalars(insert(Transaction).returning(Transaction.id), batch)
+    return ids.all()
+
+
+async def import_transactions(  # noqa: PLR0913
+    session: AsyncSession,
+    user_id: int,
+    rows: Iterable | AsyncIterable,
+    batch_size: int,
+    *,
+    keep_ids: bool = True,
+    max_errors: int | None = None,
+    on_batch: Callable[[dict], None] | None = None,
+):
+    """Validates rows and inserts the valid ones in batches, in a single transaction.
+
+    Rows may be dicts or raw JSON documents (str/bytes); blank documents are
+    skipped. Invalid rows are reported by their position and don't stop the import;
+    past ``max_errors`` they are only counted in ``error_count``.
+    """
+    result = {'processed': 0, 'created': 0, 'ids': [], 'errors': [], 'error_count': 0}
+    batch = []
+
+    async def flush():
+        ids = await _insert_batch(session, batch)
+        await track_transactions(
+            session,
+            user_id,
+            [(row['occurred_at'], row['state'], row['value'], 1) for row in batch],
+        )
+        result['created'] += len(ids)
+        if keep_ids:
+            result['ids'] += ids
+        batch.clear()
+        if on_batch:
+            on_batch(result)
+
+    async for row in _aiter(rows):
+        if isinstance(row, (str, bytes)):
+            if not row.strip():
+                continue
+            validate = TransactionSchema.model_validate_json
+        else:
+            validate = TransactionSchema.model_validate
+        index = result['processed']
+        result['processed'] += 1
+
+        try:
+            transaction = validate(row)
+        except ValidationError as error:
+            result['error_count'] += 1
+            if max_errors is not None and len(result['errors']) >= max_errors:
+                continue
+            result['errors'].append({
+                'index': index,
+                'detail': error.errors(
+                    include_url=False, include_context=False, include_input=False
+                ),
+            })
+            continue
+
+        batch.append({
+            **transaction.model_dump(),
+            'occurred_at': transaction.occurred_at or utcnow(),
+            'user_id': user_id,
+        })
+        if len(batch) >= batch_size:
+            await flush()
+
+    if batch:
+        await flush()
+    await session.commit()
+
+    return result
+
+
+def parse_csv(path: str, columns: StatementImport):
+    """Yields one dict per CSV row, mapping the configured headers onto fields."""
+    mapping = {
+        'title': columns.title_column,
+        'description': columns.description_column,
+        'state': columns.state_column,
+        'value': columns.value_column,
+        'occurred_at': columns.occurred_at_column,
+    }
+    with open(path, encoding='utf-8-sig', newline='') as file:
+        for row in csv.DictReader(file, delimiter=columns.delimiter):
+            yield {name: row.get(header) or None for name, header in mapping.items()}
+
+
+def _ofx_tokens(path: str):
+    pending = ''
+    with open(path, encoding='latin-1') as file:
+        while chunk := file.read(CHUNK_SIZE):
+            pending += chunk
+            # the last token may be cut by the chunk boundary, keep it for later
+            end = pending.rfind('<')
+            for match in OFX_TOKEN.finditer(pending, 0, end):
+                yield match.groups()
+            pending = pending[end:]
+    for match in OFX_TOKEN.finditer(pending):
+        yield match.groups()
+
+
+def parse_ofx(path: str):
+    """Yields one dict per <STMTTRN> block, reading the file in fixed size chunks.
+
+    Works for both SGML (unclosed tags) and XML flavoured OFX files.
+    """
+    transaction = None
+    for closing, tag, value in _ofx_tokens(path):
+        name = tag.upper()
+        if name == 'STMTTRN' and not closing:
+            transaction = {}
+        elif name == 'STMTTRN' and transaction is not None:
+            transaction.setdefault('title', transaction.get('description'))
+            transaction.setdefault('description', transaction.get('title'))
+            yield transaction
+            transaction = None
+        elif transaction is not None and not closing and name in OFX_FIELDS:
+            transaction[OFX_FIELDS[name]] = value.strip()
+            if name == 'DTPOSTED':
+                transaction['occurred_at'] = _ofx_datetime(value.strip())
+
+
+def _ofx_datetime(value: str):
+    """OFX dates look like YYYYMMDD[HHMMSS[.XXX]][[offset:TZ]], the offset in hours
+    from GMT. Returns naive UTC, like every stored timestamp."""
+    digits = OFX_DATETIME.match(value).group()
+    try:
+        moment = datetime.strptime(digits[:14], OFX_DATETIME_FORMATS[len(digits[:14])])
+    except (KeyError, ValueError):
+        # let TransactionSchema report the row as invalid
+        return value
+    # without an offset the time already is GMT
+    if offset := OFX_OFFSET.search(value):
+        moment -= timedelta(hours=float(offset.group(1)))
+    return moment
+
+
+@dataclass
+class ImportJob:
+    user_id: int
+    id: str = field(default_factory=lambda: uuid4().hex)
+    status: str = 'pending'
+    processed: int = 0
+    created: int = 0
+    errors: list[dict] = field(default_factory=list)
+    error_count: int = 0
+
+
+# finished jobs stay around for a day so clients can poll their outcome
+import_jobs = LocalCache(maxsize=10_000, ttl=24 * 60 * 60)
+
+
+async def spool_to_file(chunks: AsyncIterable[bytes]):
+    """Writes the request body to a temporary file, chunk by chunk."""
+    file = tempfile.NamedTemporaryFile(delete=False, suffix='.statement')
+    try:
+        with file:
+            async for chunk in chunks:
+                file.write(chunk)
+    except BaseException:
+        # the upload was cut short, e.g. the client disconnected
+        os.remove(file.name)
+        raise
+    return file.name
+
+
+async def run_statement_import(
+    job: ImportJob,
+    path: str,
+    columns: StatementImport,
+    batch_size: int,
+    max_errors: int,
+):
+    def on_batch(result):
+        job.processed = result['processed']
+        job.created = result['created']
+        job.error_count = result['error_count']
+
+    job.status = 'running'
+    if columns.format == 'ofx':
+        rows = parse_ofx(path)
+    else:
+        rows = parse_csv(path, columns)
+    try:
+        async with database.async_session() as session:
+            result = await import_transactions(
+                session,
+                job.user_id,
+                rows,
+                batch_size=batch_size,
+                keep_ids=False,
+                max_errors=max_errors,
+                on_batch=on_batch,
+            )
+    except Exception:
+        logger.exception(f'Statement import {job.id} failed')
+        job.status = 'failed'
+    else:
+        on_batch(result)
+        job.errors = result['errors']
+        job.status = 'done'
+    finally:
+        os.remove(path)
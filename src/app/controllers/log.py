@@ -0,0 +1,95 @@
+import logging
+import random
+import sys
+
+from loguru import logger
+
+from src.app.controllers.settings import Settings
+
+INTERCEPTED_LOGGERS = (
+    'uvicorn',
+    'uvicorn.access',
+    'uvicorn.error',
+    'fastapi',
+    'asyncio',
+    'starlette',
+)
+# uvicorn access records: (client_addr, method, full_path, http_version, status_code)
+ACCESS_STATUS_ARG = 4
+
+
+class InterceptHandler(logging.Handler):
+    """Forwards standard logging records to loguru.
+
+    The caller is taken from the record, which logging already resolved, instead
+    of walking the stack again for every message.
+    """
+
+    def emit(self, record):  # noqa: PLR6301
+        try:
+            level = logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+
+        def caller(entry):
+            entry.update(
+                name=record.name,
+                module=record.module,
+                function=record.funcName,
+                line=record.lineno,
+            )
+
+        logger.patch(caller).opt(exception=record.exc_info).log(
+            level, record.getMessage()
+        )
+
+
+class AccessLogSampler(logging.Filter):
+    """Keeps a fraction of successful access logs and every error response."""
+
+    def __init__(self, rate: float, sample=random.random):
+        super().__init__()
+        self.rate = rate
+        self.sample = sample
+
+    def filter(self, record):
+        args = record.args
+        if isinstance(args, tuple) and len(args) > ACCESS_STATUS_ARG:
+            status = args[ACCESS_STATUS_ARG]
+            if isinstance(status, int) and status >= 400:  # noqa: PLR2004
+                return True
+        return self.rate >= 1 or self.sample() < self.rate
+
+
+def configure_logging(settings: Settings):
+    """Routes every log through loguru sinks that write from a background queue.
+
+    With ``enqueue`` the request only pushes the record to a queue, formatting
+    and file I/O happen on loguru's worker thread.
+    """
+    logger.remove()
+    logger.add(sys.stderr, level=settings.LOG_LEVEL, enqueue=True)
+    if settings.LOG_FILE:
+        logger.add(
+            settings.LOG_FILE,
+            level=settings.LOG_LEVEL,
+            rotation='500 MB',
+            compression='zip',
+            serialize=settings.LOG_JSON,
+            enqueue=True,
+            backtrace=settings.LOG_DIAGNOSE,
+            diagnose=settings.LOG_DIAGNOSE,
+        )
+
+    for handler in logging.root.handlers[:]:
+        logging.root.removeHandler(handler)
+    logging.basicConfig(handlers=[InterceptHandler()], level=settings.LOG_LEVEL)
+
+    for logger_name in INTERCEPTED_LOGGERS:
+        logging_logger = logging.getLogger(logger_name)
+        logging_logger.handlers = []
+        logging_logger.filters = []
+        logging_logger.propagate = True
+    logging.getLogger('uvicorn.access').addFilter(
+        AccessLogSampler(settings.ACCESS_LOG_SAMPLE_RATE)
+    )
@@ -0,0 +1,151 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import Engine, event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+
+class Histogram:
+    """Cumulative histogram per label set, rendered in the Prometheus text format."""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...], buckets):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, label_values: tuple, value: float):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * len(self.buckets), 0, 0.0]
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += 1
+        series[2] += value
+
+    def count(self, label_values: tuple) -> int:
+        series = self._series.get(label_values)
+        return series[1] if series else 0
+
+    def sum(self, label_values: tuple) -> float:
+        series = self._series.get(label_values)
+        return series[2] if series else 0.0
+
+    def clear(self):
+        self._series.clear()
+
+    def render(self):
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} histogram'
+        for label_values, (counts, count, total) in sorted(self._series.items()):
+            labels = ','.join(
+                f'{name}="{_escape(value)}"'
+                for name, value in zip(self.labels, label_values)
+            )
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+            yield f'{self.name}_bucket{{{labels},le="+Inf"}} {count}'
+            yield f'{self.name}_sum{{{labels}}} {total}'
+            yield f'{self.name}_count{{{labels}}} {count}'
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration: float = 0.0
+
+
+request_queries: ContextVar[QueryStats | None] = ContextVar(
+    'request_queries', default=None
+)
+
+REQUEST_LABELS = ('method', 'route')
+request_latency = Histogram(
+    'http_request_duration_seconds',
+    'Time spent handling a request.',
+    REQUEST_LABELS,
+    LATENCY_BUCKETS,
+)
+request_query_count = Histogram(
+    'db_queries_per_request',
+    'Database queries executed while handling a request.',
+    REQUEST_LABELS,
+    QUERY_COUNT_BUCKETS,
+)
+request_query_time = Histogram(
+    'db_query_duration_seconds_per_request',
+    'Time spent in database queries while handling a request.',
+    REQUEST_LABELS,
+    LATENCY_BUCKETS,
+)
+HISTOGRAMS = (request_latency, request_query_count, request_query_time)
+# pool_status() keys to metric name and type
+POOL_METRICS = {
+    'size': ('db_pool_size', 'gauge'),
+    'checked_out': ('db_pool_checked_out', 'gauge'),
+    'overflow': ('db_pool_overflow', 'gauge'),
+    'checkouts': ('db_pool_checkouts_total', 'counter'),
+    'timeouts': ('db_pool_timeouts_total', 'counter'),
+    'wait_time': ('db_pool_wait_seconds_total', 'counter'),
+    'max_wait': ('db_pool_max_wait_seconds', 'gauge'),
+}
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, *args):
+    if request_queries.get() is not None:
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, *args):
+    stats = request_queries.get()
+    if stats is not None and conn.info.get('query_start'):
+        stats.count += 1
+        stats.duration += time.perf_counter() - conn.info['query_start'].pop()
+
+
+class MetricsMiddleware:
+    """Records latency and database usage per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = request_queries.set(stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            elapsed = time.perf_counter() - start
+            request_queries.reset(token)
+            route = scope.get('route')
+            labels = (scope['method'], route.path if route else 'unmatched')
+            request_latency.observe(labels, elapsed)
+            request_query_count.observe(labels, stats.count)
+            request_query_time.observe(labels, stats.duration)
+
+
+def render_metrics(pool: dict | None = None) -> str:
+    lines = [line for histogram in HISTOGRAMS for line in histogram.render()]
+    for key, value in (pool or {}).items():
+        name, kind = POOL_METRICS[key]
+        lines.extend((f'# TYPE {name} {kind}', f'{name} {value}'))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+
+def columns_for(model, schema: type[BaseModel]):
+    """The mapped columns behind the fields of a response schema.
+
+    Selecting them instead of the entity skips loading unused columns and the
+    identity map, the rows validate into the schema by attribute.
+    """
+    return tuple(getattr(model, field) for field in schema.model_fields)
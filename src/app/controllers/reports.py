@@ -0,0 +1,241 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable
+
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.models.models import Balance, Transaction, TransactionRollup
+
+CENT = Decimal('0.01')
+PERIODS = ('day', 'month')
+ROLLUP_MEASURES = ('count', 'total', 'income', 'expense')
+
+
+async def summarize_transactions(session: AsyncSession, user_id: int):
+    """Totals of the user's transactions, overall and by state, in one query."""
+    value = Transaction.value
+    rows = await session.execute(
+        select(
+            Transaction.state,
+            func.count().label('count'),
+            func.coalesce(func.sum(value), 0).label('total'),
+            func.coalesce(func.sum(case((value > 0, value), else_=0)), 0).label('income'),
+            func.coalesce(func.sum(case((value < 0, value), else_=0)), 0).label(
+                'expense'
+            ),
+            func.min(value).label('min'),
+            func.max(value).label('max'),
+        )
+        .where(Transaction.user_id == user_id)
+        .group_by(Transaction.state)
+        .order_by(Transaction.state)
+    )
+
+    states = []
+    summary = {'count': 0, 'total': 0, 'income': 0, 'expense': 0}
+    for row in rows.mappings():
+        states.append({**row, 'avg': _average(row['total'], row['count'])})
+        for key in summary:
+            summary[key] += row[key]
+
+    if states:
+        summary['min'] = min(state['min'] for state in states)
+        summary['max'] = max(state['max'] for state in states)
+        summary['avg'] = _average(summary['total'], summary['count'])
+    return {**summary, 'states': states}
+
+
+def _average(total: Decimal, count: int):
+    return (total / count).quantize(CENT)
+
+
+def bucket_of(occurred_at: datetime | date, period: str) -> date:
+    day = occurred_at.date() if isinstance(occurred_at, datetime) else occurred_at
+    return day if period == 'day' else day.replace(day=1)
+
+
+def _accumulate(deltas: dict, occurred_at: datetime, value: Decimal, sign: int):
+    for period in PERIODS:
+        delta = deltas.setdefault(
+            (period, bucket_of(occurred_at, period)), dict.fromkeys(ROLLUP_MEASURES, 0)
+        )
+        delta['count'] += sign
+        delta['total'] += sign * value
+        delta['income' if value > 0 else 'expense'] += sign * value
+
+
+async def update_rollups(
+    session: AsyncSession, user_id: int, changes: Iterable[tuple[datetime, Decimal, int]]
+):
+    """Applies (occurred_at, value, +1/-1) changes to the rollups with one upsert.
+
+    Runs inside the caller's transaction, so rollups commit together with the rows.
+    """
+    deltas = {}
+    for occurred_at, value, sign in changes:
+        _accumulate(deltas, occurred_at, value, sign)
+    # changes that cancel out, like a state edit, leave the rollups untouched
+    deltas = {key: delta for key, delta in deltas.items() if any(delta.values())}
+    if not deltas:
+        return
+
+    await _increment(
+        session,
+        TransactionRollup,
+        [
+            {'user_id': user_id, 'period': period, 'bucket': bucket, **delta}
+            for (period, bucket), delta in deltas.items()
+        ],
+        keys=['user_id', 'period', 'bucket'],
+        measures=ROLLUP_MEASURES,
+    )
+
+
+async def _increment(
+    session: AsyncSession, model, rows: list[dict], keys: list[str], measures
+):
+    """Inserts the rows, or atomically adds their measures to the existing ones."""
+    dialect_insert = (
+        postgresql.insert if session.bind.dialect.name == 'postgresql' else sqlite.insert
+    )
+    statement = dialect_insert(model).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=keys,
+        set_={
+            measure: getattr(model, measure) + getattr(statement.excluded, measure)
+            for measure in measures
+        },
+    )
+    await session.execute(statement)
+
+
+async def update_balances(
+    session: AsyncSession, user_id: int, changes: Iterable[tuple[str, Decimal, int]]
+):
+    """Applies (state, value, +1/-1) changes to the running balances.
+
+    Like the rollups it runs inside the caller's transaction, and the increment is
+    done by the database so concurrent writers can't lose updates.
+    """
+    deltas = {}
+    for state, value, sign in changes:
+        delta = deltas.setdefault(state, {'balance': 0, 'count': 0})
+        delta['balance'] += sign * value
+        delta['count'] += sign
+    deltas = {state: delta for state, delta in deltas.items() if any(delta.values())}
+    if not deltas:
+        return
+
+    await _increment(
+        session,
+        Balance,
+        [
+            {'user_id': user_id, 'state': state, **delta}
+            for state, delta in deltas.items()
+        ],
+        keys=['user_id', 'state'],
+        measures=('balance', 'count'),
+    )
+
+
+async def track_transactions(
+    session: AsyncSession,
+    user_id: int,
+    changes: Iterable[tuple[datetime, str, Decimal, int]],
+):
+    """Keeps rollups and balances in step with (occurred_at, state, value, +1/-1)
+    changes, +1 for a created transaction and -1 for a removed one."""
+    changes = list(changes)
+    await update_rollups(
+        session,
+        user_id,
+        [(occurred_at, value, sign) for occurred_at, _, value, sign in changes],
+    )
+    await update_balances(
+        session, user_id, [(state, value, sign) for _, state, value, sign in changes]
+    )
+
+
+async def read_balance(session: AsyncSession, user_id: int):
+    balances = await session.scalars(
+        select(Balance)
+        .where(Balance.user_id == user_id, Balance.count != 0)
+        .order_by(Balance.state)
+    )
+    states = balances.all()
+    return {
+        'balance': sum(state.balance for state in states),
+        'states': states,
+    }
+
+
+async def report_transactions(
+    session: AsyncSession,
+    user_id: int,
+    period: str,
+    start: date | None = None,
+    end: date | None = None,
+):
+    query = select(TransactionRollup).where(
+        TransactionRollup.user_id == user_id,
+        TransactionRollup.period == period,
+        TransactionRollup.count != 0,
+    )
+    if start:
+        query = query.where(TransactionRollup.bucket >= bucket_of(start, period))
+    if end:
+        query = query.where(TransactionRollup.bucket <= end)
+
+    rollups = await session.scalars(query.order_by(TransactionRollup.bucket))
+    return rollups.all()
+
+
+async def check_rollups(session: AsyncSession, user_id: int, repair: bool = False):
+    """Rebuilds the user's rollups from the transactions and diffs them with the
+    stored ones. With ``repair`` the stored rollups are replaced by the rebuilt ones.
+    """
+    expected = {}
+    rows = await session.stream(
+        select(Transaction.occurred_at, Transaction.value)
+        .where(Transaction.user_id == user_id)
+        .execution_options(yield_per=1000)
+    )
+    async for occurred_at, value in rows:
+        _accumulate(expected, occurred_at, value, 1)
+
+    rollups = await session.scalars(
+        select(TransactionRollup).where(
+            TransactionRollup.user_id == user_id, TransactionRollup.count != 0
+        )
+    )
+    stored = {
+        (rollup.period, rollup.bucket): {
+            measure: getattr(rollup, measure) for measure in ROLLUP_MEASURES
+        }
+        for rollup in rollups
+    }
+
+    diffs = []
+    for period, bucket in sorted(expected.keys() | stored.keys()):
+        expected_measures = expected.get((period, bucket))
+        stored_measures = stored.get((period, bucket))
+        if expected_measures != stored_measures:
+            diffs.append({
+                'period': period,
+                'bucket': bucket,
+                'expected': expected_measures,
+                'stored': stored_measures,
+            })
+
+    if repair and diffs:
+        await session.execute(
+            delete(TransactionRollup).where(TransactionRollup.user_id == user_id)
+        )
+        session.add_all(
+            TransactionRollup(user_id=user_id, period=period, bucket=bucket, **measures)
+            for (period, bucket), measures in expected.items()
+        )
+        await session.commit()
+    return diffs
@@ -0,0 +1,46 @@
+from sqlalchemy import column, or_, select, table
+
+from src.app.models.models import Transaction
+
+transactions_fts = table('transactions_fts', column('rowid'), column('transactions_fts'))
+# the trigram tokenizer cannot match anything shorter than one trigram
+MIN_FTS_TERM_LENGTH = 3
+
+
+def _escape_like(term: str):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def search_transactions(term: str, dialect_name: str):
+    """Case-insensitive substring search over title and description.
+
+    On Postgres the ILIKE patterns are served by the trigram GIN indexes, on
+    SQLite the term is matched against the FTS5 trigram table.
+    """
+    if dialect_name == 'sqlite' and len(term) >= MIN_FTS_TERM_LENGTH:
+        phrase = '"{}"'.format(term.replace('"', '""'))
+        return Transaction.id.in_(
+            select(transactions_fts.c.rowid).where(
+                transactions_fts.c.transactions_fts.match(phrase)
+            )
+        )
+
+    pattern = f'%{_escape_like(term)}%'
+    return or_(
+        Transaction.title.ilike(pattern, escape='\\'),
+        Transaction.description.ilike(pattern, escape='\\'),
+    )
+
+
+def filter_transactions(filters, dialect_name: str):
+    """Where clauses for the search/title/description/state criteria that are set."""
+    clauses = []
+    if filters.search:
+        clauses.append(search_transactions(filters.search, dialect_name))
+    if filters.title:
+        clauses.append(Transaction.title.contains(filters.title))
+    if filters.description:
+        clauses.append(Transaction.description.contains(filters.description))
+    if filters.state:
+        clauses.append(Transaction.state.contains(filters.state))
+    return clauses
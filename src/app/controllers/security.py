@@ -1,69 +1,113 @@
-from datetime import datetime, timedelta
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
-from zoneinfo import ZoneInfo
 
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-from jwt import ExpiredSignatureError, decode, encode
+from jwt import PyJWTError
 from pwdlib import PasswordHash
-from python_multipart.exceptions import DecodeError
+from pwdlib.hashers.argon2 import Argon2Hasher
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.app.controllers.cache import LocalCache, PrincipalCache
 from src.app.controllers.database import get_session
 from src.app.controllers.settings import Settings
+from src.app.controllers.tokens import token_service_from_settings
 from src.app.models.models import User
 
 settings = Settings()
 
 
-pdw_context = PasswordHash.recommended()
+pdw_context = PasswordHash((
+    Argon2Hasher(
+        time_cost=settings.ARGON2_TIME_COST,
+        memory_cost=settings.ARGON2_MEMORY_COST,
+        parallelism=settings.ARGON2_PARALLELISM,
+    ),
+))
+# Argon2 releases the GIL, so a thread pool keeps hashing off the event loop
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash'
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
+principal_cache = PrincipalCache(
+    LocalCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL)
+)
+token_service = token_service_from_settings(settings)
 
 
 def create_access_token(data: dict):
-    # data={sub: email}, ou seja, o email é o username
-    to_encode = data.copy()
+    # data={sub: email, uid: id}, ou seja, o email é o username
+    return token_service.encode(data)
 
-    expire = datetime.now(tz=ZoneInfo('UTC')) + timedelta(
-        minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
-    )
-    to_encode.update({'exp': expire})
-
-    encoded_jwt = encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
-    return encoded_jwt
+def user_claims(user: User):
+    return {'sub': user.email, 'uid': user.id}
 
 
-def get_password_hash(password: str):
-    return pdw_context.hash(password)
+async def get_password_hash(password: str):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, pdw_context.hash, password)
 
 
-def verify_password(plain_password: str, hashed_password: str):
-    return pdw_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        password_executor, pdw_context.verify, plain_password, hashed_password
+    )
 
 
-async def get_current_user(
-    session: AsyncSession = Depends(get_session),
-    token: str = Depends(oauth2_scheme),
-):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=HTTPStatus.UNAUTHORIZED,
         detail='Could not validate credentials',
         headers={'WWW-Authenticate': 'Bearer'},
     )
+
+
+def _decode_token(token: str):
     try:
-        payload = decode(token, settings.SECRET_KEY, algorithms=settings.ALGORITHM)
-        subject_email = payload.get('sub')
-        if not subject_email:
-            raise credentials_exception
+        payload = token_service.decode(token)
+    except PyJWTError:
+        raise _credentials_exception()
+    if not payload.get('sub'):
+        raise _credentials_exception()
+    return payload
 
-    except ExpiredSignatureError:
-        raise credentials_exception
-    except DecodeError:
-        raise credentials_exception
-    user = await session.scalar(select(User).where(User.email == subject_email))
+
+async def get_current_user(
+    session: AsyncSession = Depends(get_session),
+    token: str = Depends(oauth2_scheme),
+):
+    subject_email = _decode_token(token)['sub']
+
+    cached_user = principal_cache.get(subject_email)
+    if cached_user:
+        return await session.merge(cached_user, load=False)
+
+    user = await session.scalar(
+        select(User).where(User.email == subject_email, User.deleted_at.is_(None))
+    )
 
     if not user:
-        raise credentials_exception
+        raise _credentials_exception()
+    principal_cache.set(subject_email, user)
     return user
+
+
+async def get_current_user_id(
+    session: AsyncSession = Depends(get_session),
+    token: str = Depends(oauth2_scheme),
+) -> int:
+    """Id of the authenticated user, read from the token when it carries one.
+
+    Meant for read-only handlers that only scope queries by ``user_id``; they skip
+    loading the user. The claim stays valid after the account is deleted, so
+    handlers that write go through ``get_current_user``. Tokens issued without
+    the ``uid`` claim fall back to the lookup.
+    """
+    user_id = _decode_token(token).get('uid')
+    if isinstance(user_id, int):
+        return user_id
+    return (await get_current_user(session, token)).id
@@ -7,3 +7,31 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    PRINCIPAL_CACHE_SIZE: int = 1024
+    PRINCIPAL_CACHE_TTL: int = 60
+    PASSWORD_HASH_WORKERS: int = 4
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+    IMPORT_BATCH_SIZE: int = 1000
+    IMPORT_MAX_ERRORS: int = 100
+    EXPORT_BATCH_SIZE: int = 1000
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DATABASE_REPLICA_URL: str | None = None
+    READ_YOUR_WRITES_SECONDS: int = 5
+    JWT_PRIVATE_KEY: str | None = None
+    JWT_KEY_ID: str = 'default'
+    JWT_VERIFICATION_KEYS: dict[str, str] = {}
+    LOG_LEVEL: str = 'INFO'
+    LOG_FILE: str | None = 'logs/application.log'
+    LOG_JSON: bool = True
+    LOG_DIAGNOSE: bool = False
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0
+    BULK_BATCH_SIZE: int = 1000
+    USER_PURGE_THRESHOLD: int = 10_000
+    PURGE_BATCH_SIZE: int = 5000
+    PURGE_SWEEP_INTERVAL: float = 600
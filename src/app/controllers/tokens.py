@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import jwt
+from jwt.algorithms import get_default_algorithms
+
+from src.app.controllers.settings import Settings
+
+
+class TokenService:
+    """Signs and verifies access tokens with keys parsed once, at startup.
+
+    Tokens carry the id of the signing key in the ``kid`` header. Keys of
+    previous rotations stay accepted while they are listed in
+    ``verification_keys``; tokens without a ``kid`` are checked against the
+    current key.
+    """
+
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        algorithm: str,
+        signing_key: str,
+        key_id: str,
+        expire_minutes: int,
+        verification_keys: dict[str, str] | None = None,
+    ):
+        try:
+            prepare_key = get_default_algorithms()[algorithm].prepare_key
+        except KeyError:
+            raise ValueError(f'Unsupported token algorithm: {algorithm}') from None
+        self.algorithms = [algorithm]
+        self.key_id = key_id
+        self.expire_minutes = expire_minutes
+        self._signing_key = prepare_key(signing_key)
+        self._verification_keys = {
+            kid: prepare_key(key) for kid, key in (verification_keys or {}).items()
+        }
+        # asymmetric keys verify with the public half of the signing key
+        public_key = getattr(self._signing_key, 'public_key', None)
+        self._verification_keys[key_id] = (
+            public_key() if public_key else self._signing_key
+        )
+
+    def encode(self, claims: dict) -> str:
+        expire = datetime.now(tz=ZoneInfo('UTC')) + timedelta(minutes=self.expire_minutes)
+        return jwt.encode(
+            {**claims, 'exp': expire},
+            self._signing_key,
+            algorithm=self.algorithms[0],
+            headers={'kid': self.key_id},
+        )
+
+    def decode(self, token: str) -> dict:
+        """Returns the verified claims, raises ``jwt.PyJWTError`` otherwise."""
+        kid = jwt.get_unverified_header(token).get('kid', self.key_id)
+        key = self._verification_keys.get(kid)
+        if key is None:
+            raise jwt.InvalidKeyError(f'Unknown key id: {kid}')
+        return jwt.decode(token, key, algorithms=self.algorithms)
+
+
+def token_service_from_settings(settings: Settings) -> TokenService:
+    symmetric = settings.ALGORITHM.startswith('HS')
+    if not symmetric and not settings.JWT_PRIVATE_KEY:
+        raise ValueError(f'JWT_PRIVATE_KEY is required for {settings.ALGORITHM}')
+    return TokenService(
+        algorithm=settings.ALGORITHM,
+        signing_key=settings.SECRET_KEY if symmetric else settings.JWT_PRIVATE_KEY,
+        key_id=settings.JWT_KEY_ID,
+        expire_minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES,
+        verification_keys=settings.JWT_VERIFICATION_KEYS,
+    )
@@ -1,15 +1,40 @@
+import asyncio
 import http
-import logging
+from contextlib import asynccontextmanager
 
 import uvicorn
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
-from loguru import logger
-
+from fastapi import Depends, FastAPI
+from fastapi.responses import HTMLResponse, PlainTextResponse
+
+from src.app.controllers import database
+from src.app.controllers.accounts import sweep_deleted_users
+from src.app.controllers.database import read_your_writes
+from src.app.controllers.log import configure_logging
+from src.app.controllers.metrics import MetricsMiddleware, render_metrics
+from src.app.controllers.settings import Settings
 from src.app.models.schemas import Message
 from src.app.routes import auth, transactions, users
 
-app = FastAPI(title='Financial Tracker')
+settings = Settings()
+configure_logging(settings)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # finishes purges of deleted users a failure or a restart left behind
+    sweep = asyncio.create_task(
+        sweep_deleted_users(settings.PURGE_SWEEP_INTERVAL, settings.PURGE_BATCH_SIZE)
+    )
+    yield
+    sweep.cancel()
+
+
+app = FastAPI(
+    title='Financial Tracker',
+    dependencies=[Depends(read_your_writes)],
+    lifespan=lifespan,
+)
+app.add_middleware(MetricsMiddleware)
 
 if __name__ == '__main__':
     uvicorn.run(
@@ -20,60 +45,6 @@ if __name__ == '__main__':
         log_level=None,
     )
 
-# Remove existing handlers to loguru works
-for handler in logging.root.handlers[:]:
-    logging.root.removeHandler(handler)
-
-
-class InterceptHandler(logging.Handler):
-    @classmethod
-    def emit(cls, record):
-        """
-
-        :param record:
-        """
-        # Get corresponding Loguru level
-        try:
-            level = logger.level(record.levelname).name
-        except ValueError:
-            level = record.levelno
-
-        # Find caller to get correct stack depth
-        frame, depth = logging.currentframe(), 2
-        while frame.f_back and frame.f_code.co_filename == logging.__file__:
-            frame = frame.f_back
-            depth += 1
-
-        logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
-
-
-# Intercept standard logging
-logging.basicConfig(handlers=[InterceptHandler()], level=logging.INFO)
-
-loggers = (
-    'uvicorn',
-    'uvicorn.access',
-    'uvicorn.error',
-    'fastapi',
-    'asyncio',
-    'starlette',
-)
-
-for logger_name in loggers:
-    logging_logger = logging.getLogger(logger_name)
-    logging_logger.handlers = []
-    logging_logger.propagate = True
-
-logger.add(
-    'logs/application.log',
-    rotation='500 MB',
-    compression='zip',
-    level='INFO',
-    backtrace=True,
-    diagnose=True,
-)
-
-
 app.include_router(users.router)
 app.include_router(auth.router)
 app.include_router(transactions.router)
@@ -84,6 +55,11 @@ async def read_root():
     return {'message': 'Olá Mundo'}
 
 
+@app.get('/metrics', response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return render_metrics(database.pool_status(database.engine))
+
+
 @app.get('/olamundo/', response_class=HTMLResponse)
 def say_hello():
     return """
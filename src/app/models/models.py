@@ -1,14 +1,53 @@
-from datetime import datetime
+from datetime import date, datetime
+from decimal import ROUND_HALF_EVEN, Decimal
+from zoneinfo import ZoneInfo
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import (
+    DDL,
+    BigInteger,
+    Engine,
+    ForeignKey,
+    Index,
+    TypeDecorator,
+    event,
+    func,
+)
 from sqlalchemy.orm import Mapped, mapped_column, registry, relationship
 
 table_registry = registry()
 
 
+def utcnow():
+    # timestamps are stored as naive UTC
+    return datetime.now(tz=ZoneInfo('UTC')).replace(tzinfo=None)
+
+
+class Money(TypeDecorator):
+    """Amounts stored as integer minor units (cents), exposed as Decimal.
+
+    Sums of integers are exact, so aggregates never need rounding fixes.
+    """
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):  # noqa: PLR6301
+        if value is None:
+            return None
+        cents = Decimal(str(value) if isinstance(value, float) else value).scaleb(2)
+        return int(cents.to_integral_value(ROUND_HALF_EVEN))
+
+    def process_result_value(self, value, dialect):  # noqa: PLR6301
+        if value is None:
+            return None
+        return Decimal(value).scaleb(-2)
+
+
 @table_registry.mapped_as_dataclass
 class User:
     __tablename__ = 'users'
+    # ids end up in access tokens, SQLite must not hand a deleted user's id out again
+    __table_args__ = {'sqlite_autoincrement': True}
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     username: Mapped[str] = mapped_column(unique=True)
@@ -18,19 +57,125 @@ class User:
     updated_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now(), onupdate=func.now()
     )
+    # set while the account's rows are purged in the background
+    deleted_at: Mapped[datetime | None] = mapped_column(init=False, default=None)
+    # the database deletes the transactions, see the foreign key
     transactions: Mapped[list['Transaction']] = relationship(
-        init=False, cascade='all, delete-orphan', lazy='selectin'
+        init=False,
+        repr=False,
+        cascade='all, delete-orphan',
+        lazy='raise',
+        passive_deletes=True,
     )
 
 
 @table_registry.mapped_as_dataclass
 class Transaction:
     __tablename__ = 'transactions'
+    __table_args__ = (
+        Index('ix_transactions_user_id_id', 'user_id', 'id'),
+        Index(
+            'ix_transactions_title_trgm',
+            'title',
+            postgresql_using='gin',
+            postgresql_ops={'title': 'gin_trgm_ops'},
+        ).ddl_if(dialect='postgresql'),
+        Index(
+            'ix_transactions_description_trgm',
+            'description',
+            postgresql_using='gin',
+            postgresql_ops={'description': 'gin_trgm_ops'},
+        ).ddl_if(dialect='postgresql'),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     title: Mapped[str]
     description: Mapped[str]
     state: Mapped[str]
-    value: Mapped[float]
+    value: Mapped[Decimal] = mapped_column(Money)
+
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'))
+    occurred_at: Mapped[datetime] = mapped_column(
+        default_factory=utcnow, server_default=func.now()
+    )
+    created_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now())
+
+
+@table_registry.mapped_as_dataclass
+class TransactionRollup:
+    """Per user aggregates of transactions by day and by month of occurrence."""
 
-    user_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
+    __tablename__ = 'transaction_rollups'
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE'), primary_key=True
+    )
+    period: Mapped[str] = mapped_column(primary_key=True)
+    bucket: Mapped[date] = mapped_column(primary_key=True)
+    count: Mapped[int] = mapped_column(default=0)
+    total: Mapped[Decimal] = mapped_column(Money, default=0)
+    income: Mapped[Decimal] = mapped_column(Money, default=0)
+    expense: Mapped[Decimal] = mapped_column(Money, default=0)
+
+
+@table_registry.mapped_as_dataclass
+class Balance:
+    """Running balance of a user's transactions in a given state."""
+
+    __tablename__ = 'balances'
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE'), primary_key=True
+    )
+    state: Mapped[str] = mapped_column(primary_key=True)
+    balance: Mapped[Decimal] = mapped_column(Money, default=0)
+    count: Mapped[int] = mapped_column(default=0)
+
+
+@event.listens_for(Engine, 'connect')
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores foreign keys, and so ON DELETE CASCADE, unless asked per connection
+    if 'sqlite' in type(dbapi_connection).__module__:
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
+
+# Postgres serves substring search with trigram indexes, SQLite with an FTS5 table
+# kept in sync with transactions by triggers
+event.listen(
+    table_registry.metadata,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'),
+)
+
+TRANSACTIONS_FTS_DDL = (
+    """CREATE VIRTUAL TABLE transactions_fts USING fts5(
+        title, description, content='transactions', content_rowid='id',
+        tokenize='trigram'
+    )""",
+    """CREATE TRIGGER transactions_fts_insert AFTER INSERT ON transactions BEGIN
+        INSERT INTO transactions_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER transactions_fts_delete AFTER DELETE ON transactions BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER transactions_fts_update AFTER UPDATE ON transactions BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO transactions_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END""",
+)
+
+for statement in TRANSACTIONS_FTS_DDL:
+    event.listen(
+        Transaction.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite')
+    )
+event.listen(
+    Transaction.__table__,
+    'after_drop',
+    DDL('DROP TABLE IF EXISTS transactions_fts').execute_if(dialect='sqlite'),
+)
@@ -1,26 +1,122 @@
-import locale
-
-from pydantic import BaseModel, ConfigDict, EmailStr
-
-
-def moeda(valor):
-    locale.setlocale(locale.LC_ALL, 'en_US.UTF-8')
-    return locale.currency(valor, grouping=True, symbol=False)
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Annotated, Literal
+from zoneinfo import ZoneInfo
+
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    EmailStr,
+    Field,
+    PlainSerializer,
+    field_validator,
+    model_validator,
+)
+
+# exact in Python and in the database, still a plain number in JSON
+Amount = Annotated[
+    Decimal,
+    Field(decimal_places=2),
+    PlainSerializer(float, return_type=float, when_used='json'),
+]
+# ten integer digits keep the cents of balances and rollups, summed over millions
+# of transactions, inside a BIGINT
+TransactionAmount = Annotated[Amount, Field(max_digits=12)]
+
+
+def naive_utc(value: datetime | None):
+    if value and value.tzinfo:
+        return value.astimezone(ZoneInfo('UTC')).replace(tzinfo=None)
+    return value
 
 
 class TransactionSchema(BaseModel):
     title: str
     description: str
     state: str
-    value: float
+    value: TransactionAmount
+    occurred_at: datetime | None = None
+
+    _naive_utc = field_validator('occurred_at')(naive_utc)
 
 
 class TransactionPublic(TransactionSchema):
     id: int
+    value: Amount
+    occurred_at: datetime
 
 
 class TransactionList(BaseModel):
     transactions: list[TransactionPublic]
+    next_cursor: str | None = None
+
+
+class TransactionStats(BaseModel):
+    count: int = 0
+    total: Amount = 0
+    income: Amount = 0
+    expense: Amount = 0
+    min: Amount | None = None
+    max: Amount | None = None
+    avg: Amount | None = None
+
+
+class StateSummary(TransactionStats):
+    state: str
+
+
+class TransactionSummary(TransactionStats):
+    states: list[StateSummary] = []
+
+
+class StateBalance(BaseModel):
+    state: str
+    balance: Amount
+    count: int
+
+
+class BalancePublic(BaseModel):
+    balance: Amount
+    states: list[StateBalance]
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TransactionImportError(BaseModel):
+    index: int
+    detail: list[dict]
+
+
+class TransactionImport(BaseModel):
+    created: int
+    ids: list[int]
+    errors: list[TransactionImportError]
+    error_count: int
+
+
+class StatementImport(BaseModel):
+    format: Literal['csv', 'ofx'] = 'csv'
+    delimiter: str = ','
+    title_column: str = 'title'
+    description_column: str = 'description'
+    state_column: str = 'state'
+    value_column: str = 'value'
+    occurred_at_column: str = 'occurred_at'
+
+
+class TransactionExport(BaseModel):
+    format: Literal['ndjson', 'csv'] = 'ndjson'
+    currency: Literal['BRL', 'USD', 'EUR', 'JPY'] = 'BRL'
+    locale: Literal['en_US', 'pt_BR', 'de_DE'] | None = None
+
+
+class ImportJobPublic(BaseModel):
+    id: str
+    status: str
+    processed: int
+    created: int
+    errors: list[TransactionImportError]
+    error_count: int
+    model_config = ConfigDict(from_attributes=True)
 
 
 class Token(BaseModel):
@@ -47,14 +143,20 @@ class UserSchema(BaseModel):
 
 class UserList(BaseModel):
     users: list[UserPublic]
+    next_cursor: str | None = None
 
 
 class FilterPage(BaseModel):
-    offset: int = 0
-    limit: int = 100
+    offset: int = Field(0, ge=0)
+    limit: int = Field(100, ge=1, le=1000)
+
+
+class FilterCursor(FilterPage):
+    cursor: str | None = None
 
 
-class FilterTransaction(FilterPage):
+class FilterTransaction(FilterCursor):
+    search: str | None = None
     title: str | None = None
     description: str | None = None
     state: str | None = None
@@ -64,3 +166,54 @@ class TransactionUpdate(BaseModel):
     title: str | None = None
     description: str | None = None
     state: str | None = None
+    occurred_at: datetime | None = None
+
+    _naive_utc = field_validator('occurred_at')(naive_utc)
+
+
+class TransactionSelection(BaseModel):
+    ids: list[int] | None = None
+    search: str | None = None
+    title: str | None = None
+    description: str | None = None
+    state: str | None = None
+
+    @model_validator(mode='after')
+    def not_everything(self):
+        if not any(self.model_dump(exclude_none=True).values()):
+            raise ValueError('Select transactions by ids or at least one filter')
+        return self
+
+
+class TransactionBulkUpdate(BaseModel):
+    selection: TransactionSelection
+    changes: TransactionUpdate
+
+    @model_validator(mode='after')
+    def has_changes(self):
+        if not self.changes.model_dump(exclude_none=True):
+            raise ValueError('Nothing to update')
+        return self
+
+
+class TransactionBulkResult(BaseModel):
+    affected: int
+
+
+class ReportFilter(BaseModel):
+    period: Literal['day', 'month'] = 'month'
+    start: date | None = None
+    end: date | None = None
+
+
+class ReportBucket(BaseModel):
+    bucket: date
+    count: int
+    total: Amount
+    income: Amount
+    expense: Amount
+
+
+class TransactionReport(BaseModel):
+    period: str
+    buckets: list[ReportBucket]
@@ -10,6 +10,7 @@ from src.app.controllers.database import get_session
 from src.app.controllers.security import (
     create_access_token,
     get_current_user,
+    user_claims,
     verify_password,
 )
 from src.app.models.models import User
@@ -27,7 +28,9 @@ async def login_for_access_token(
     form_data: OAuth2Form,
     session: Session,
 ):
-    user = await session.scalar(select(User).where(User.email == form_data.username))
+    user = await session.scalar(
+        select(User).where(User.email == form_data.username, User.deleted_at.is_(None))
+    )
 
     if not user:
         raise HTTPException(
@@ -35,18 +38,16 @@ async def login_for_access_token(
             detail='Incorrect email or password',
         )
 
-    if not verify_password(form_data.password, user.password):
+    if not await verify_password(form_data.password, user.password):
         raise HTTPException(
             status_code=HTTPStatus.UNAUTHORIZED,
             detail='Incorrect email or password',
         )
-    access_token = create_access_token({'sub': user.email})
+    access_token = create_access_token(user_claims(user))
     return {'access_token': access_token, 'token_type': 'Bearer'}
 
 
 @router.post('/refresh_token', response_model=Token)
 async def refresh_access_token(user: CurrentUser):
-    new_access_token = create_access_token(
-        data={'sub': user.email},
-    )
+    new_access_token = create_access_token(user_claims(user))
     return {'access_token': new_access_token, 'token_type': 'Bearer'}
@@ -1,26 +1,68 @@
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.app.controllers.database import get_session
-from src.app.controllers.security import get_current_user
-from src.app.models.models import Transaction, User
+from src.app.controllers.database import get_read_session, get_session
+from src.app.controllers.exports import MEDIA_TYPES, export_transactions
+from src.app.controllers.imports import (
+    ImportJob,
+    import_jobs,
+    import_transactions,
+    iter_lines,
+    run_statement_import,
+    spool_to_file,
+)
+from src.app.controllers.pagination import decode_cursor, paginate
+from src.app.controllers.projections import columns_for
+from src.app.controllers.reports import (
+    read_balance,
+    report_transactions,
+    summarize_transactions,
+    track_transactions,
+)
+from src.app.controllers.search import filter_transactions
+from src.app.controllers.security import get_current_user, get_current_user_id
+from src.app.controllers.settings import Settings
+from src.app.models.models import Transaction, User, utcnow
 from src.app.models.schemas import (
+    BalancePublic,
     FilterTransaction,
+    ImportJobPublic,
     Message,
+    ReportFilter,
+    StatementImport,
+    TransactionBulkResult,
+    TransactionBulkUpdate,
+    TransactionExport,
+    TransactionImport,
     TransactionList,
     TransactionPublic,
+    TransactionReport,
     TransactionSchema,
+    TransactionSelection,
+    TransactionSummary,
     TransactionUpdate,
-    moeda,
 )
 
 router = APIRouter(prefix='/transactions', tags=['Transações'])
+settings = Settings()
 Session = Annotated[AsyncSession, Depends(get_session)]
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
 CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUserId = Annotated[int, Depends(get_current_user_id)]
+
+
+TRANSACTION_COLUMNS = columns_for(Transaction, TransactionPublic)
+# fields that move a transaction between rollup buckets or balances
+TRACKED_FIELDS = {'state', 'occurred_at'}
+
+
+def _change(transaction: Transaction, sign: int):
+    return (transaction.occurred_at, transaction.state, transaction.value, sign)
 
 
 @router.post('/', response_model=TransactionPublic)
@@ -35,36 +77,234 @@ async def crate_transaction(
         state=transaction.state,
         user_id=user.id,
         value=transaction.value,
+        occurred_at=transaction.occurred_at or utcnow(),
     )
-    transaction.value = moeda(transaction.value)
     session.add(transaction_db)
+    await track_transactions(session, user.id, [_change(transaction_db, 1)])
     await session.commit()
     await session.refresh(transaction_db)
 
     return transaction_db
 
 
+@router.post('/bulk', status_code=HTTPStatus.CREATED, response_model=TransactionImport)
+async def bulk_import_transactions(
+    request: Request,
+    user: CurrentUser,
+    session: Session,
+):
+    """Imports a JSON array of transactions, or an NDJSON stream when the request
+    is sent as application/x-ndjson."""
+    if request.headers.get('content-type', '').startswith('application/x-ndjson'):
+        rows = iter_lines(request.stream())
+    else:
+        try:
+            rows = await request.json()
+        except ValueError:
+            rows = None
+        if not isinstance(rows, list):
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST, detail='Expected a JSON array'
+            )
+
+    return await import_transactions(
+        session,
+        user.id,
+        rows,
+        batch_size=settings.IMPORT_BATCH_SIZE,
+        max_errors=settings.IMPORT_MAX_ERRORS,
+    )
+
+
+@router.post('/import', status_code=HTTPStatus.ACCEPTED, response_model=ImportJobPublic)
+async def import_statement(
+    request: Request,
+    user: CurrentUser,
+    statement: Annotated[StatementImport, Query()],
+    background_tasks: BackgroundTasks,
+):
+    """Receives a CSV or OFX statement as the raw request body and imports it in
+    the background, see GET /transactions/import/{job_id} for the progress."""
+    path = await spool_to_file(request.stream())
+    job = ImportJob(user_id=user.id)
+    import_jobs.set(job.id, job)
+    background_tasks.add_task(
+        run_statement_import,
+        job,
+        path,
+        statement,
+        settings.IMPORT_BATCH_SIZE,
+        settings.IMPORT_MAX_ERRORS,
+    )
+
+    return job
+
+
+@router.get('/import/{job_id}', response_model=ImportJobPublic)
+async def read_import_job(job_id: str, user_id: CurrentUserId):
+    job = import_jobs.get(job_id)
+    if not job or job.user_id != user_id:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Not Found')
+
+    return job
+
+
+@router.get('/export', response_class=StreamingResponse)
+async def export_user_transactions(
+    user_id: CurrentUserId,
+    export: Annotated[TransactionExport, Query()],
+):
+    return StreamingResponse(
+        export_transactions(
+            user_id,
+            export.format,
+            settings.EXPORT_BATCH_SIZE,
+            export.currency,
+            export.locale,
+        ),
+        media_type=MEDIA_TYPES[export.format],
+        headers={
+            'Content-Disposition': f'attachment; filename=transactions.{export.format}'
+        },
+    )
+
+
+@router.get('/summary', response_model=TransactionSummary)
+async def summary_transactions(session: Session, user_id: CurrentUserId):
+    return await summarize_transactions(session, user_id)
+
+
+@router.get('/balance', response_model=BalancePublic)
+async def balance_transactions(session: Session, user_id: CurrentUserId):
+    return await read_balance(session, user_id)
+
+
+@router.get('/report', response_model=TransactionReport)
+async def report_user_transactions(
+    session: Session,
+    user_id: CurrentUserId,
+    report_filter: Annotated[ReportFilter, Query()],
+):
+    buckets = await report_transactions(
+        session, user_id, report_filter.period, report_filter.start, report_filter.end
+    )
+
+    return {'period': report_filter.period, 'buckets': buckets}
+
+
 @router.get('/', response_model=TransactionList)
 async def list_transactions(
+    session: ReadSession,
+    user_id: CurrentUserId,
+    transaction_filter: Annotated[FilterTransaction, Query()],
+):
+    query = select(*TRANSACTION_COLUMNS).where(
+        Transaction.user_id == user_id,
+        *filter_transactions(transaction_filter, session.bind.dialect.name),
+    )
+
+    if transaction_filter.cursor:
+        query = query.where(Transaction.id > decode_cursor(transaction_filter.cursor))
+    else:
+        query = query.offset(transaction_filter.offset)
+
+    transactions = await session.execute(
+        query.order_by(Transaction.id).limit(transaction_filter.limit + 1)
+    )
+    transactions, next_cursor = paginate(transactions.all(), transaction_filter.limit)
+
+    return {'transactions': transactions, 'next_cursor': next_cursor}
+
+
+def _selected(session: AsyncSession, user_id: int, selection: TransactionSelection):
+    clauses = [
+        Transaction.user_id == user_id,
+        *filter_transactions(selection, session.bind.dialect.name),
+    ]
+    if selection.ids is not None:
+        clauses.append(Transaction.id.in_(selection.ids))
+    return clauses
+
+
+@router.patch('/bulk', response_model=TransactionBulkResult)
+async def bulk_update_transactions(
     session: Session,
     user: CurrentUser,
-    transaction_filter: Annotated[FilterTransaction, Query()],
+    bulk: TransactionBulkUpdate,
 ):
-    query = select(Transaction).where(Transaction.user_id == user.id)
-    if transaction_filter.title:
-        query = query.filter(Transaction.title.contains(transaction_filter.title))
-    if transaction_filter.description:
-        query = query.filter(
-            Transaction.description.contains(transaction_filter.description)
+    selected = _selected(session, user.id, bulk.selection)
+    changes = bulk.changes.model_dump(exclude_none=True)
+    columns = (Transaction.occurred_at, Transaction.state, Transaction.value)
+
+    if not changes.keys() & TRACKED_FIELDS:
+        updated = await session.execute(
+            update(Transaction)
+            .where(*selected)
+            .values(**changes)
+            .execution_options(synchronize_session=False)
         )
-    if transaction_filter.state:
-        query = query.filter(Transaction.state.contains(transaction_filter.state))
+        affected = updated.rowcount
+    else:
+        # as in patch_transaction, the replaced values are read and locked first,
+        # walking the selection by id so only one batch is held at a time
+        affected = last_id = 0
+        while batch := (
+            await session.execute(
+                select(Transaction.id, *columns)
+                .where(*selected, Transaction.id > last_id)
+                .order_by(Transaction.id)
+                .limit(settings.BULK_BATCH_SIZE)
+                .with_for_update()
+            )
+        ).all():
+            last_id = batch[-1].id
+            updated = await session.execute(
+                update(Transaction)
+                .where(Transaction.id.in_([row.id for row in batch]))
+                .values(**changes)
+                .returning(*columns)
+            )
+            current = updated.all()
+            affected += len(current)
+            await track_transactions(
+                session,
+                user.id,
+                [(*row[1:], -1) for row in batch] + [(*row, 1) for row in current],
+            )
+    await session.commit()
+
+    return {'affected': affected}
+
 
-    transactions = await session.scalars(
-        query.offset(transaction_filter.offset).limit(transaction_filter.limit)
+@router.post('/bulk/delete', response_model=TransactionBulkResult)
+async def bulk_delete_transactions(
+    session: Session,
+    user: CurrentUser,
+    selection: TransactionSelection,
+):
+    # deleted rows leave the selection, each batch takes the first ids still in it
+    batch = (
+        select(Transaction.id)
+        .where(*_selected(session, user.id, selection))
+        .order_by(Transaction.id)
+        .limit(settings.BULK_BATCH_SIZE)
     )
+    affected = 0
+    while True:
+        deleted = await session.execute(
+            delete(Transaction)
+            .where(Transaction.id.in_(batch))
+            .returning(Transaction.occurred_at, Transaction.state, Transaction.value)
+            .execution_options(synchronize_session=False)
+        )
+        rows = deleted.all()
+        affected += len(rows)
+        await track_transactions(session, user.id, [(*row, -1) for row in rows])
+        if len(rows) < settings.BULK_BATCH_SIZE:
+            break
+    await session.commit()
 
-    return {'transactions': transactions.all()}
+    return {'affected': affected}
 
 
 @router.patch('/{transaction_id}', response_model=TransactionPublic)
@@ -74,22 +314,34 @@ async def patch_transaction(
     user: CurrentUser,
     transaction: TransactionUpdate,
 ):
-    transaction_db = await session.scalar(
-        select(Transaction).where(
-            Transaction.id == transaction_id and user.id == Transaction.user_id
+    owned = (Transaction.id == transaction_id, Transaction.user_id == user.id)
+    changes = transaction.model_dump(exclude_unset=True, exclude_none=True)
+
+    previous = None
+    if changes.keys() & TRACKED_FIELDS:
+        # rollups and balances need the values being replaced
+        previous = (
+            await session.execute(
+                select(Transaction.occurred_at, Transaction.state, Transaction.value)
+                .where(*owned)
+                .with_for_update()
+            )
+        ).one_or_none()
+
+    if changes:
+        transaction_db = await session.scalar(
+            update(Transaction).where(*owned).values(**changes).returning(Transaction)
         )
-    )
+    else:
+        transaction_db = await session.scalar(select(Transaction).where(*owned))
     if not transaction_db:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Not Found')
-    for (
-        key,
-        value,
-    ) in transaction.model_dump(exclude_unset=True).items():
-        setattr(transaction_db, key, value)
 
-    session.add(transaction_db)
+    if previous:
+        await track_transactions(
+            session, user.id, [(*previous, -1), _change(transaction_db, 1)]
+        )
     await session.commit()
-    await session.refresh(transaction_db)
 
     return transaction_db
 
@@ -100,14 +352,16 @@ async def delete_transaction(
     session: Session,
     user: CurrentUser,
 ):
-    transaction = await session.scalar(
-        select(Transaction).where(
-            Transaction.id == transaction_id, Transaction.user_id == user.id
-        )
+    # only the request whose DELETE matched the row takes it off the balance
+    deleted = await session.execute(
+        delete(Transaction)
+        .where(Transaction.id == transaction_id, Transaction.user_id == user.id)
+        .returning(Transaction.occurred_at, Transaction.state, Transaction.value)
     )
-    if not transaction:
+    row = deleted.one_or_none()
+    if not row:
         raise HTTPException(detail='Not Found', status_code=HTTPStatus.NOT_FOUND)
-    await session.delete(transaction)
+    await track_transactions(session, user.id, [(*row, -1)])
     await session.commit()
 
     return {'message': 'Transaction has been delete successfully'}
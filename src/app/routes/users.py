@@ -2,19 +2,25 @@ import http
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
 from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.app.controllers.database import get_session
+from src.app.controllers.accounts import count_transactions, purge_user
+from src.app.controllers.database import get_read_session, get_session
+from src.app.controllers.pagination import decode_cursor, paginate
+from src.app.controllers.projections import columns_for
 from src.app.controllers.security import (
     get_current_user,
     get_password_hash,
+    principal_cache,
 )
-from src.app.models.models import User
+from src.app.controllers.settings import Settings
+from src.app.models.models import User, utcnow
 from src.app.models.schemas import (
-    FilterPage,
+    FilterCursor,
     Message,
     UserList,
     UserPublic,
@@ -22,45 +28,56 @@ from src.app.models.schemas import (
 )
 
 Session = Annotated[AsyncSession, Depends(get_session)]
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
 CurrentUser = Annotated[User, Depends(get_current_user)]
 router = APIRouter(prefix='/users', tags=['Usuários'])
+settings = Settings()
+USER_COLUMNS = columns_for(User, UserPublic)
 
 
 @router.get('/', status_code=http.HTTPStatus.OK, response_model=UserList)
 async def read_user(
-    session: Session,
-    filters: Annotated[FilterPage, Query()],
+    session: ReadSession,
+    filters: Annotated[FilterCursor, Query()],
 ):
-    query = await session.scalars(
-        select(User).offset(filters.offset).limit(filters.limit)
-    )
-    user_list = query.all()
-    return {'users': user_list}
+    query = select(*USER_COLUMNS).where(User.deleted_at.is_(None))
+    if filters.cursor:
+        query = query.where(User.id > decode_cursor(filters.cursor))
+    else:
+        query = query.offset(filters.offset)
+
+    rows = await session.execute(query.order_by(User.id).limit(filters.limit + 1))
+    user_list, next_cursor = paginate(rows.all(), filters.limit)
+    return {'users': user_list, 'next_cursor': next_cursor}
 
 
 @router.post('/', status_code=http.HTTPStatus.CREATED, response_model=UserPublic)
 async def create_user(user: UserSchema, session: Session):
+    """Registers the user with a single INSERT, the unique constraints reject
+    taken usernames and emails, so concurrent signups can't create duplicates."""
+    hashed_password = await get_password_hash(user.password)
+    dialect_insert = (
+        postgresql.insert if session.bind.dialect.name == 'postgresql' else sqlite.insert
+    )
     db_user = await session.scalar(
-        select(User).where((User.username == user.username) | (User.email == user.email))
+        dialect_insert(User)
+        .values(username=user.username, email=user.email, password=hashed_password)
+        .on_conflict_do_nothing()
+        .returning(User)
     )
 
-    if db_user:
-        if db_user.username == user.username:
-            raise HTTPException(
-                detail='Username already exists',
-                status_code=http.HTTPStatus.CONFLICT,
-            )
-        elif db_user.email == user.email:
-            raise HTTPException(
-                detail='Email already exists',
-                status_code=http.HTTPStatus.CONFLICT,
-            )
-    hashed_password = get_password_hash(user.password)
-    db_user = User(username=user.username, email=user.email, password=hashed_password)
-
-    session.add(db_user)
+    if not db_user:
+        # only a failed signup pays for finding out which value is taken
+        taken_username = await session.scalar(
+            select(User.id).where(User.username == user.username)
+        )
+        raise HTTPException(
+            detail='Username already exists'
+            if taken_username
+            else 'Email already exists',
+            status_code=http.HTTPStatus.CONFLICT,
+        )
     await session.commit()
-    await session.refresh(db_user)
     return db_user
 
 
@@ -79,9 +96,10 @@ async def update_user(
         raise HTTPException(
             detail='Not enough permissions', status_code=HTTPStatus.FORBIDDEN
         )
+    principal_cache.invalidate(current_user.email)
     try:
         current_user.username = user.username
-        current_user.password = get_password_hash(user.password)
+        current_user.password = await get_password_hash(user.password)
         current_user.email = user.email
         await session.commit()
         await session.refresh(current_user)
@@ -103,11 +121,25 @@ async def delete_user(
     user_id: int,
     session: Session,
     current_user: CurrentUser,
+    response: Response,
+    background_tasks: BackgroundTasks,
 ):
+    """Deletes the user, the database cascades to the transactions.
+
+    Large accounts are hidden right away and purged in the background.
+    """
     if current_user.id != user_id:
         raise HTTPException(
             detail='Not enough permissions', status_code=HTTPStatus.FORBIDDEN
         )
+    principal_cache.invalidate(current_user.email)
+    if await count_transactions(session, user_id) > settings.USER_PURGE_THRESHOLD:
+        current_user.deleted_at = utcnow()
+        await session.commit()
+        background_tasks.add_task(purge_user, user_id, settings.PURGE_BATCH_SIZE)
+        response.status_code = HTTPStatus.ACCEPTED
+        return {'message': 'User deletion scheduled'}
+
     await session.delete(current_user)
     await session.commit()
 
@@ -119,8 +151,12 @@ async def delete_user(
     status_code=http.HTTPStatus.OK,
     response_model=UserPublic,
 )
-async def read_user_by_id(user_id: int, session: Session):
-    user_db = await session.scalar(select(User).where(User.id == user_id))
+async def read_user_by_id(user_id: int, session: ReadSession):
+    user_db = (
+        await session.execute(
+            select(*USER_COLUMNS).where(User.id == user_id, User.deleted_at.is_(None))
+        )
+    ).one_or_none()
     if not user_db:
         raise HTTPException(detail='User not found', status_code=HTTPStatus.NOT_FOUND)
     else:
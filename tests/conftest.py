@@ -1,16 +1,17 @@
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
 from datetime import datetime
 
 import factory
 import pytest
 import pytest_asyncio
 from fastapi.testclient import TestClient
-from sqlalchemy import event
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
 from testcontainers.postgres import PostgresContainer
 
 from src.app.controllers.database import get_session
-from src.app.controllers.security import get_password_hash
+from src.app.controllers.security import get_password_hash, principal_cache
 from src.app.controllers.settings import Settings
 from src.app.main import app
 from src.app.models.models import User, table_registry
@@ -29,7 +30,7 @@ class UserFactory(factory.Factory):
 async def user(session):
     password = 'texto'
     user = UserFactory(
-        password=get_password_hash(password),
+        password=await get_password_hash(password),
     )
     session.add(user)
     await session.commit()
@@ -43,7 +44,7 @@ async def user(session):
 async def other_user(session):
     password = 'texto'
     other_user = UserFactory(
-        password=get_password_hash(password),
+        password=await get_password_hash(password),
     )
     session.add(other_user)
     await session.commit()
@@ -62,6 +63,18 @@ def client(session):
         app.dependency_overrides[get_session] = get_session_override
         yield client
     app.dependency_overrides.clear()
+    principal_cache.clear()
+
+
+@pytest.fixture
+def background_session(session, monkeypatch):
+    """Work done outside the request (jobs, streamed responses) uses the test session"""
+
+    @asynccontextmanager
+    async def session_override():
+        yield session
+
+    monkeypatch.setattr('src.app.controllers.database.async_session', session_override)
 
 
 @pytest.fixture(scope='session')
@@ -71,6 +84,18 @@ def engine():
         yield _engine
 
 
+@pytest_asyncio.fixture
+async def concurrent_engine(engine):
+    """Engine of its own for tests opening many sessions at once.
+
+    Past its size the shared pool would bind its wait queue to the event loop of
+    that test, breaking every later test.
+    """
+    _engine = create_async_engine(engine.url, poolclass=NullPool)
+    yield _engine
+    await _engine.dispose()
+
+
 @pytest_asyncio.fixture
 async def session(engine):
     async with engine.begin() as conn:
@@ -89,11 +114,11 @@ def _mock_db_time(*, model=User, time=datetime.now()):
         if hasattr(target, 'updated_at'):
             target.updated_at = time
 
-    event.listen(User, 'before_insert', fake_time_hook)
+    event.listen(model, 'before_insert', fake_time_hook)
 
     yield time
 
-    event.remove(User, 'before_insert', fake_time_hook)
+    event.remove(model, 'before_insert', fake_time_hook)
 
 
 @pytest.fixture
@@ -101,6 +126,43 @@ def mock_db_time():
     return _mock_db_time
 
 
+@contextmanager
+def _count_queries(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', before_cursor_execute)
+
+    yield statements
+
+    event.remove(engine.sync_engine, 'before_cursor_execute', before_cursor_execute)
+
+
+async def _explain(session, query):
+    statement = str(query.compile(session.bind, compile_kwargs={'literal_binds': True}))
+    if session.bind.dialect.name == 'postgresql':
+        # tiny test tables would always be seq scanned, ask whether an index applies
+        await session.execute(text('SET LOCAL enable_seqscan = off'))
+        plan = await session.execute(text(f'EXPLAIN {statement}'))
+    else:
+        plan = await session.execute(text(f'EXPLAIN QUERY PLAN {statement}'))
+    plan = '\n'.join(str(row[-1]) for row in plan)
+    await session.rollback()
+    return plan
+
+
+@pytest.fixture
+def explain():
+    return _explain
+
+
+@pytest.fixture
+def count_queries(engine):
+    return lambda: _count_queries(engine)
+
+
 @pytest.fixture
 def token(user, client):
     response = client.post(
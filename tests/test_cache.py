@@ -0,0 +1,45 @@
+from src.app.controllers.cache import LocalCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_local_cache_get_set_delete():
+    cache = LocalCache(maxsize=10, ttl=60)
+
+    cache.set('key', 'value')
+    assert cache.get('key') == 'value'
+
+    cache.delete('key')
+    assert cache.get('key') is None
+
+
+def test_local_cache_expires_entries():
+    timer = FakeTimer()
+    cache = LocalCache(maxsize=10, ttl=60, timer=timer)
+    cache.set('key', 'value')
+
+    timer.now = 59
+    assert cache.get('key') == 'value'
+
+    timer.now = 60
+    assert cache.get('key') is None
+    assert len(cache) == 0
+
+
+def test_local_cache_evicts_least_recently_used():
+    cache = LocalCache(maxsize=2, ttl=60)
+    cache.set('a', 'A')
+    cache.set('b', 'B')
+    cache.get('a')
+
+    cache.set('c', 'C')
+
+    assert cache.get('a') == 'A'
+    assert cache.get('b') is None
+    assert cache.get('c') == 'C'
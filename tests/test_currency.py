@@ -0,0 +1,64 @@
+import locale
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+
+from src.app.controllers.currency import (
+    format_currencies,
+    format_currency,
+    get_format,
+)
+
+
+@pytest.mark.parametrize(
+    ('value', 'currency', 'locale_name', 'symbol', 'expected'),
+    [
+        (Decimal('1234567.891'), 'BRL', 'en_US', False, '1,234,567.89'),
+        (Decimal('1234567.891'), 'BRL', 'pt_BR', True, 'R$ 1.234.567,89'),
+        (Decimal('-0.5'), 'EUR', 'de_DE', True, '-0,50 €'),
+        (0.1 + 0.2, 'USD', 'en_US', True, '$0.30'),
+        (2.5, 'JPY', 'en_US', False, '2'),
+        (10, 'BRL', 'en_US', False, '10.00'),
+    ],
+)
+def test_format_currency(value, currency, locale_name, symbol, expected):  # noqa: PLR0913
+    assert format_currency(value, currency, locale_name, symbol) == expected
+
+
+def test_format_currency_rejects_unknown_formats():
+    with pytest.raises(ValueError, match='XYZ'):
+        format_currency(1, 'XYZ')
+
+
+def test_format_currency_does_not_touch_the_process_locale(monkeypatch):
+    def setlocale(*args):
+        raise AssertionError('setlocale called')
+
+    monkeypatch.setattr(locale, 'setlocale', setlocale)
+
+    assert format_currency(Decimal('1000'), locale='pt_BR') == '1.000,00'
+
+
+def test_format_is_compiled_once_per_currency_and_locale():
+    get_format.cache_clear()
+
+    format_currencies(range(100), 'USD', 'en_US')
+    format_currency(1, 'USD', 'en_US')
+
+    assert get_format.cache_info().misses == 1
+
+
+def test_format_currencies_across_threads():
+    values = [Decimal(i).scaleb(-2) for i in range(10_000)]
+    expected = format_currencies(values, 'BRL', 'pt_BR')
+
+    def run(locale_name):
+        return format_currencies(values, 'BRL', locale_name)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(run, ['pt_BR', 'en_US'] * 8))
+
+    assert results[::2] == [expected] * 8
+    assert expected[1234] == '12,34'
+    assert results[1][1234] == '12.34'
@@ -0,0 +1,164 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.app.controllers.database import (
+    READ_PRIMARY_COOKIE,
+    MeteredQueuePool,
+    engine_options,
+    pool_status,
+)
+from src.app.models.models import User, table_registry
+
+
+def test_engine_options_size_the_pool(settings):
+    settings = settings.model_copy(
+        update={
+            'DATABASE_URL': 'postgresql+psycopg://app@localhost/app',
+            'DB_POOL_SIZE': 20,
+            'DB_MAX_OVERFLOW': 5,
+        }
+    )
+
+    options = engine_options(settings)
+
+    assert options['poolclass'] is MeteredQueuePool
+    assert options['pool_size'] == 20  # noqa: PLR2004
+    assert options['max_overflow'] == 5  # noqa: PLR2004
+    assert options['pool_pre_ping'] is True
+
+
+def test_engine_options_leave_sqlite_pool_alone(settings):
+    settings = settings.model_copy(update={'DATABASE_URL': 'sqlite+aiosqlite:///db'})
+
+    assert 'poolclass' not in engine_options(settings)
+
+
+@pytest_asyncio.fixture
+async def limited_engine(engine):
+    _engine = create_async_engine(
+        engine.url,
+        poolclass=MeteredQueuePool,
+        pool_size=2,
+        max_overflow=1,
+        pool_timeout=0.2,
+    )
+    yield _engine
+    await _engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics_at_the_limit(limited_engine):
+    connections = [await limited_engine.connect() for _ in range(3)]
+
+    assert pool_status(limited_engine) | {'wait_time': 0, 'max_wait': 0} == {
+        'size': 2,
+        'checked_out': 3,
+        'overflow': 1,
+        'checkouts': 3,
+        'timeouts': 0,
+        'wait_time': 0,
+        'max_wait': 0,
+    }
+
+    with pytest.raises(exc.TimeoutError):
+        await limited_engine.connect()
+
+    async def release_later():
+        await asyncio.sleep(0.05)
+        await connections.pop().close()
+
+    waiter, _ = await asyncio.gather(limited_engine.connect(), release_later())
+    await waiter.close()
+    for connection in connections:
+        await connection.close()
+
+    status = pool_status(limited_engine)
+    assert status['checked_out'] == 0
+    assert status['timeouts'] == 1
+    assert status['checkouts'] == 4  # noqa: PLR2004
+    assert status['max_wait'] >= 0.2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_pool_queues_bursts_instead_of_failing(engine):
+    burst_engine = create_async_engine(
+        engine.url, poolclass=MeteredQueuePool, pool_size=2, max_overflow=1
+    )
+    checked_out = []
+
+    async def request():
+        async with burst_engine.connect() as connection:
+            checked_out.append(burst_engine.sync_engine.pool.checkedout())
+            await connection.execute(text('SELECT 1'))
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(request() for _ in range(30)))
+    status = pool_status(burst_engine)
+    await burst_engine.dispose()
+
+    assert max(checked_out) == 3  # noqa: PLR2004
+    assert status['checkouts'] == 30  # noqa: PLR2004
+    assert status['timeouts'] == 0
+    assert status['max_wait'] > 0
+
+
+@pytest_asyncio.fixture
+async def replica(monkeypatch):
+    """A separate database standing in for a replica, holding different users"""
+    replica_engine = create_async_engine(
+        'sqlite+aiosqlite:///:memory:', poolclass=StaticPool
+    )
+    async with replica_engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+    replica_session = async_sessionmaker(replica_engine, expire_on_commit=False)
+    async with replica_session() as session:
+        session.add(User(username='replica', email='replica@test.com', password='x'))
+        await session.commit()
+
+    monkeypatch.setattr('src.app.controllers.database.replica_session', replica_session)
+    yield
+    await replica_engine.dispose()
+
+
+@pytest.mark.usefixtures('replica')
+def test_reads_go_to_the_replica(client, user):
+    response = client.get('/users/')
+
+    assert [u['username'] for u in response.json()['users']] == ['replica']
+    assert client.get(f'/users/{user.id}').json()['username'] == 'replica'
+
+
+@pytest.mark.usefixtures('replica')
+def test_reads_follow_the_client_writes(client, user):
+    response = client.post(
+        '/users/',
+        json={'username': 'new', 'email': 'new@test.com', 'password': 'secret'},
+    )
+    assert READ_PRIMARY_COOKIE in response.cookies
+
+    response = client.get('/users/')
+
+    assert [u['username'] for u in response.json()['users']] == [user.username, 'new']
+
+
+@pytest.mark.usefixtures('replica')
+def test_reads_return_to_the_replica_after_the_window(client):
+    client.cookies.set(READ_PRIMARY_COOKIE, '0')
+
+    response = client.get('/users/')
+
+    assert [u['username'] for u in response.json()['users']] == ['replica']
+
+
+def test_write_cookie_only_with_a_replica(client):
+    response = client.post(
+        '/users/',
+        json={'username': 'new', 'email': 'new@test.com', 'password': 'secret'},
+    )
+
+    assert READ_PRIMARY_COOKIE not in response.cookies
@@ -1,8 +1,13 @@
 from dataclasses import asdict
+from datetime import datetime
+from decimal import Decimal
 
 import pytest
-from sqlalchemy import select
+from sqlalchemy import select, text
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import selectinload
 
+from src.app.controllers.search import search_transactions
 from src.app.models.models import Transaction, User
 
 
@@ -14,7 +19,11 @@ async def test_create_user_without_transaction(session, mock_db_time, user):
         session.add(new_user)
         await session.commit()
 
-    user = await session.scalar(select(User).where(User.username == 'test'))
+    user = await session.scalar(
+        select(User)
+        .where(User.username == 'test')
+        .options(selectinload(User.transactions))
+    )
 
     assert asdict(user) == {
         'id': 2,
@@ -23,22 +32,25 @@ async def test_create_user_without_transaction(session, mock_db_time, user):
         'password': 'secret',
         'created_at': time,
         'updated_at': time,
+        'deleted_at': None,
         'transactions': [],
     }
 
 
 @pytest.mark.asyncio
-async def test_create_transaction(session, user):
-    transaction = Transaction(
-        title='Teste titulo',
-        description='Teste desc',
-        state='designada',
-        user_id=user.id,
-        value=500,
-    )
-
-    session.add(transaction)
-    await session.commit()
+async def test_create_transaction(session, mock_db_time, user):
+    with mock_db_time(model=Transaction) as time:
+        transaction = Transaction(
+            title='Teste titulo',
+            description='Teste desc',
+            state='designada',
+            user_id=user.id,
+            value=500,
+            occurred_at=datetime(2025, 1, 1, 12),
+        )
+
+        session.add(transaction)
+        await session.commit()
 
     transaction = await session.scalar(select(Transaction))
 
@@ -49,6 +61,8 @@ async def test_create_transaction(session, user):
         'id': 1,
         'user_id': 1,
         'value': 500.00,
+        'occurred_at': datetime(2025, 1, 1, 12),
+        'created_at': time,
     }
 
 
@@ -65,6 +79,61 @@ async def test_user_transaction_relationship(session, user: User):
     await session.commit()
     await session.refresh(user)
 
-    user = await session.scalar(select(User).where(User.id == user.id))
+    user = await session.scalar(
+        select(User).where(User.id == user.id).options(selectinload(User.transactions))
+    )
 
     assert user.transactions == [transaction]
+
+
+@pytest.mark.asyncio
+async def test_user_transactions_are_not_loaded_by_default(session, user: User):
+    user = await session.scalar(select(User).where(User.id == user.id))
+
+    with pytest.raises(InvalidRequestError):
+        user.transactions
+
+
+@pytest.mark.asyncio
+async def test_list_transactions_query_uses_user_id_index(session, user, explain):
+    query = (
+        select(Transaction)
+        .where(Transaction.user_id == user.id, Transaction.id > 0)
+        .order_by(Transaction.id)
+        .limit(100)
+    )
+
+    plan = await explain(session, query)
+
+    assert 'ix_transactions_user_id_id' in plan
+
+
+@pytest.mark.asyncio
+async def test_search_query_uses_search_index(session, explain):
+    dialect_name = session.bind.dialect.name
+    query = select(Transaction).where(search_transactions('mercado', dialect_name))
+
+    plan = await explain(session, query)
+
+    if dialect_name == 'postgresql':
+        assert '_trgm' in plan
+    else:
+        assert 'VIRTUAL TABLE INDEX' in plan
+
+
+@pytest.mark.asyncio
+async def test_transaction_value_is_stored_in_cents(session, user):
+    session.add(
+        Transaction(
+            title='a', description='a', state='feita', value=Decimal('10.05'), user_id=1
+        )
+    )
+    await session.commit()
+
+    cents = await session.scalar(text('SELECT value FROM transactions'))
+    transaction = await session.scalar(
+        select(Transaction).execution_options(populate_existing=True)
+    )
+
+    assert cents == 1005  # noqa: PLR2004
+    assert transaction.value == Decimal('10.05')
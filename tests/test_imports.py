@@ -0,0 +1,135 @@
+import tempfile
+import tracemalloc
+from datetime import datetime
+
+import pytest
+from starlette.requests import ClientDisconnect
+
+from src.app.controllers.imports import (
+    CHUNK_SIZE,
+    parse_csv,
+    parse_ofx,
+    spool_to_file,
+)
+from src.app.models.schemas import StatementImport
+
+ROWS = 30_000
+MEMORY_LIMIT = 8 * CHUNK_SIZE
+OFX_TRANSACTION = (
+    '<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250101<TRNAMT>-50.00'
+    '<FITID>{0}<NAME>Mercado {0}<MEMO>Compra</STMTTRN>\n'
+)
+
+
+def _peak_memory(rows):
+    tracemalloc.start()
+    for _ in rows:
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def test_parse_csv_maps_columns(tmp_path):
+    path = tmp_path / 'extrato.csv'
+    path.write_text('Data;Histórico;Tipo;Valor\n2025-01-01;Mercado;debito;-50.5\n')
+    columns = StatementImport(
+        delimiter=';',
+        title_column='Histórico',
+        description_column='Histórico',
+        state_column='Tipo',
+        value_column='Valor',
+        occurred_at_column='Data',
+    )
+
+    assert list(parse_csv(path, columns)) == [
+        {
+            'title': 'Mercado',
+            'description': 'Mercado',
+            'state': 'debito',
+            'value': '-50.5',
+            'occurred_at': '2025-01-01',
+        }
+    ]
+
+
+def test_parse_ofx_sgml_and_xml(tmp_path):
+    path = tmp_path / 'extrato.ofx'
+    path.write_text(
+        'OFXHEADER:100\n<OFX><BANKTRANLIST>\n'
+        '<STMTTRN>\n<TRNTYPE>CREDIT\n<DTPOSTED>20250105120000[-3:BRT]\n'
+        '<TRNAMT>1500.00\n<NAME>Salario\n</STMTTRN>\n'
+        '<STMTTRN><TRNTYPE>DEBIT</TRNTYPE><TRNAMT>-50.00</TRNAMT>'
+        '<NAME>Mercado</NAME><MEMO>Compra</MEMO></STMTTRN>'
+        '</BANKTRANLIST></OFX>'
+    )
+
+    assert list(parse_ofx(path)) == [
+        {
+            'state': 'CREDIT',
+            # 12:00 at GMT-3
+            'occurred_at': datetime(2025, 1, 5, 15),
+            'value': '1500.00',
+            'title': 'Salario',
+            'description': 'Salario',
+        },
+        {
+            'state': 'DEBIT',
+            'value': '-50.00',
+            'title': 'Mercado',
+            'description': 'Compra',
+        },
+    ]
+
+
+@pytest.mark.parametrize(
+    ('value', 'expected'),
+    [
+        ('20250131230000[-3:BRT]', datetime(2025, 2, 1, 2)),
+        ('20250101013000.000[+5.5:IST]', datetime(2024, 12, 31, 20)),
+        ('20250101120000[0:GMT]', datetime(2025, 1, 1, 12)),
+        ('20250101', datetime(2025, 1, 1)),
+    ],
+)
+def test_parse_ofx_converts_offsets_to_utc(tmp_path, value, expected):
+    path = tmp_path / 'extrato.ofx'
+    path.write_text(f'<STMTTRN><DTPOSTED>{value}<TRNAMT>-1.00</STMTTRN>')
+
+    [transaction] = parse_ofx(path)
+
+    assert transaction['occurred_at'] == expected
+
+
+@pytest.mark.asyncio
+async def test_spool_to_file_removes_interrupted_uploads(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+
+    async def chunks():
+        yield b'title,description,state,value\n'
+        raise ClientDisconnect
+
+    with pytest.raises(ClientDisconnect):
+        await spool_to_file(chunks())
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_parse_ofx_memory_does_not_grow_with_file(tmp_path):
+    path = tmp_path / 'extrato.ofx'
+    with open(path, 'w', encoding='utf-8') as file:
+        for i in range(ROWS):
+            file.write(OFX_TRANSACTION.format(i))
+
+    assert path.stat().st_size > MEMORY_LIMIT
+    assert _peak_memory(parse_ofx(path)) < MEMORY_LIMIT
+
+
+def test_parse_csv_memory_does_not_grow_with_file(tmp_path):
+    path = tmp_path / 'extrato.csv'
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('title,description,state,value\n')
+        for i in range(ROWS):
+            file.write(f'Mercado {i},Compra de supermercado,debito,-50.00\n')
+
+    assert path.stat().st_size > MEMORY_LIMIT
+    assert _peak_memory(parse_csv(path, StatementImport())) < MEMORY_LIMIT
@@ -0,0 +1,86 @@
+import inspect
+import json
+import logging
+from time import perf_counter, sleep
+
+import pytest
+from loguru import logger
+
+from src.app.controllers.log import AccessLogSampler, configure_logging
+
+
+def _access_record(status):
+    return logging.LogRecord(
+        'uvicorn.access',
+        logging.INFO,
+        __file__,
+        1,
+        '%s - "%s %s HTTP/%s" %d',
+        ('127.0.0.1:1234', 'GET', '/', '1.1', status),
+        None,
+    )
+
+
+def test_access_log_sampler_keeps_a_fraction_of_successes():
+    samples = iter([0.05, 0.5, 0.09, 0.95])
+    sampler = AccessLogSampler(0.1, sample=lambda: next(samples))
+
+    kept = [sampler.filter(_access_record(200)) for _ in range(4)]
+
+    assert kept == [True, False, True, False]
+
+
+def test_access_log_sampler_keeps_every_error():
+    sampler = AccessLogSampler(0, sample=lambda: 1)
+
+    assert sampler.filter(_access_record(500))
+    assert sampler.filter(_access_record(404))
+    assert not sampler.filter(_access_record(200))
+
+
+@pytest.fixture
+def log_settings(settings, tmp_path):
+    settings = settings.model_copy(update={'LOG_FILE': str(tmp_path / 'app.log')})
+    configure_logging(settings)
+    yield settings
+    logger.complete()
+    configure_logging(settings.model_copy(update={'LOG_FILE': None}))
+
+
+def test_standard_logging_is_written_as_json(log_settings):
+    line = inspect.currentframe().f_lineno + 1
+    logging.getLogger('uvicorn.error').warning('pool %s', 'exhausted')
+    logger.complete()
+
+    with open(log_settings.LOG_FILE, encoding='utf-8') as log_file:
+        record = json.loads(log_file.readline())['record']
+
+    assert record['message'] == 'pool exhausted'
+    assert record['level']['name'] == 'WARNING'
+    assert record['name'] == 'uvicorn.error'
+    assert record['module'] == 'test_log'
+    assert record['function'] == 'test_standard_logging_is_written_as_json'
+    assert record['line'] == line
+
+
+@pytest.mark.usefixtures('log_settings')
+def test_enqueued_sink_does_not_block_the_caller():
+    def slow_sink(message):
+        sleep(0.01)
+
+    def log_many():
+        start = perf_counter()
+        for i in range(20):
+            logger.info('request {}', i)
+        return perf_counter() - start
+
+    sink_id = logger.add(slow_sink, enqueue=False)
+    blocking = log_many()
+    logger.remove(sink_id)
+
+    sink_id = logger.add(slow_sink, enqueue=True)
+    enqueued = log_many()
+    logger.remove(sink_id)
+
+    assert blocking >= 0.2  # noqa: PLR2004
+    assert enqueued < blocking / 4
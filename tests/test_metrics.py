@@ -0,0 +1,99 @@
+from http import HTTPStatus
+
+import pytest
+
+from src.app.controllers.metrics import HISTOGRAMS, Histogram, request_query_count
+
+TRANSACTION = {'title': 'Mercado', 'description': 'Compra', 'state': 'feita', 'value': 10}
+USER = {'username': 'new', 'email': 'new@test.com', 'password': 'secret'}
+
+
+def _clear_metrics():
+    for histogram in HISTOGRAMS:
+        histogram.clear()
+
+
+@pytest.fixture
+def metrics():
+    yield
+    _clear_metrics()
+
+
+@pytest.fixture
+def headers(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post('/transactions/', headers=headers, json=TRANSACTION)
+    return headers
+
+
+# queries per request once the user is in the principal cache
+@pytest.mark.parametrize(
+    ('method', 'path', 'route', 'body', 'queries'),
+    [
+        ('get', '/users/', '/users/', None, 1),
+        ('get', '/users/1', '/users/{user_id}', None, 1),
+        ('post', '/users/', '/users/', USER, 1),
+        ('put', '/users/1', '/users/{user_id}', USER, 2),
+        ('delete', '/users/1', '/users/{user_id}', None, 2),
+        ('get', '/transactions/', '/transactions/', None, 1),
+        ('post', '/transactions/', '/transactions/', TRANSACTION, 4),
+        ('post', '/transactions/bulk', '/transactions/bulk', [TRANSACTION] * 3, 3),
+        (
+            'patch',
+            '/transactions/1',
+            '/transactions/{transaction_id}',
+            {'state': 'pendente'},
+            3,
+        ),
+        ('delete', '/transactions/1', '/transactions/{transaction_id}', None, 3),
+        ('get', '/transactions/summary', '/transactions/summary', None, 1),
+        ('get', '/transactions/balance', '/transactions/balance', None, 1),
+        ('get', '/transactions/report', '/transactions/report', None, 1),
+    ],
+)
+@pytest.mark.usefixtures('metrics')
+def test_queries_per_endpoint(client, headers, method, path, route, body, queries):  # noqa: PLR0913, PLR0917
+    # warm the principal cache so every endpoint is measured the same way
+    client.post('/auth/refresh_token', headers=headers)
+    _clear_metrics()
+
+    response = client.request(method, path, headers=headers, json=body)
+
+    assert response.status_code < HTTPStatus.BAD_REQUEST
+    label = (method.upper(), route)
+    assert request_query_count.count(label) == 1
+    assert request_query_count.sum(label) == queries
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram('latency', 'Latency.', ('route',), (0.1, 1))
+    for value in (0.05, 0.5, 5):
+        histogram.observe(('/a"b',), value)
+
+    assert list(histogram.render()) == [
+        '# HELP latency Latency.',
+        '# TYPE latency histogram',
+        'latency_bucket{route="/a\\"b",le="0.1"} 1',
+        'latency_bucket{route="/a\\"b",le="1"} 2',
+        'latency_bucket{route="/a\\"b",le="+Inf"} 3',
+        'latency_sum{route="/a\\"b"} 5.55',
+        'latency_count{route="/a\\"b"} 3',
+    ]
+
+
+@pytest.mark.usefixtures('metrics')
+def test_metrics_endpoint(client):
+    client.get('/users/1')
+    client.get('/nothing-here')
+
+    response = client.get('/metrics')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/plain')
+    lines = response.text.splitlines()
+    assert (
+        'db_queries_per_request_count{method="GET",route="/users/{user_id}"} 1' in lines
+    )
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="unmatched"} 1' in lines
+    )
@@ -0,0 +1,136 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.app.controllers.reports import (
+    check_rollups,
+    read_balance,
+    update_balances,
+    update_rollups,
+)
+from src.app.models.models import Transaction, TransactionRollup
+from src.app.models.schemas import TransactionSchema, TransactionUpdate
+from src.app.routes.transactions import (
+    crate_transaction,
+    delete_transaction,
+    patch_transaction,
+)
+
+
+@pytest.mark.asyncio
+async def test_check_rollups_detects_and_repairs_drift(session, user):
+    transactions = [
+        Transaction(
+            title='a',
+            description='a',
+            state='feita',
+            value=value,
+            user_id=user.id,
+            occurred_at=datetime(2025, 1, day),
+        )
+        for day, value in ((1, 100), (2, -40))
+    ]
+    session.add_all(transactions)
+    await update_rollups(
+        session, user.id, [(t.occurred_at, t.value, 1) for t in transactions]
+    )
+    await session.commit()
+
+    assert await check_rollups(session, user.id) == []
+
+    await session.execute(
+        update(TransactionRollup)
+        .where(TransactionRollup.period == 'month')
+        .values(total=0)
+    )
+    await session.commit()
+
+    diffs = await check_rollups(session, user.id, repair=True)
+    assert [(diff['period'], diff['stored']['total']) for diff in diffs] == [('month', 0)]
+    assert diffs[0]['expected']['total'] == 60  # noqa: PLR2004
+    assert await check_rollups(session, user.id) == []
+
+
+@pytest.mark.asyncio
+async def test_balance_does_not_drift_under_concurrent_writes(concurrent_engine, user):
+    values = [(-1) ** i * (i * 37 % 1000) for i in range(200)]
+    write_sessions = async_sessionmaker(concurrent_engine, expire_on_commit=False)
+
+    async def write(value):
+        async with write_sessions() as write_session:
+            write_session.add(
+                Transaction(
+                    title='t',
+                    description='d',
+                    state='feita',
+                    value=value,
+                    user_id=user.id,
+                )
+            )
+            await update_balances(write_session, user.id, [('feita', value, 1)])
+            await write_session.commit()
+
+    await asyncio.gather(*(write(value) for value in values))
+
+    async with AsyncSession(concurrent_engine) as session:
+        balance = await read_balance(session, user.id)
+        total = await session.scalar(select(func.sum(Transaction.value)))
+    assert balance['balance'] == total == sum(values)
+    assert balance['states'][0].count == len(values)
+
+
+@pytest.mark.asyncio
+async def test_balance_does_not_drift_under_concurrent_handlers(concurrent_engine, user):
+    patch = TransactionUpdate(state='pendente', occurred_at=datetime(2025, 1, 1))
+    write_sessions = async_sessionmaker(concurrent_engine, expire_on_commit=False)
+
+    async def call(handler, *args):
+        async with write_sessions() as write_session:
+            try:
+                return await handler(*args, write_session)
+            except HTTPException:
+                await write_session.rollback()
+
+    async def create(value, write_session):
+        transaction = TransactionSchema(
+            title='t', description='d', state='feita', value=value
+        )
+        return await crate_transaction(transaction, user, write_session)
+
+    async def edit(transaction_id, write_session):
+        return await patch_transaction(transaction_id, write_session, user, patch)
+
+    async def remove(transaction_id, write_session):
+        return await delete_transaction(transaction_id, write_session, user)
+
+    created = await asyncio.gather(
+        *(call(create, (-1) ** i * (i * 37 % 1000 + 1)) for i in range(60))
+    )
+    ids = [transaction.id for transaction in created]
+    # the same rows are patched twice, deleted twice, and patched while deleted
+    await asyncio.gather(
+        *(
+            call(handler, transaction_id)
+            for transaction_id in ids
+            for handler in ((edit, edit), (remove, remove), (edit, remove))[
+                transaction_id % 3
+            ]
+        )
+    )
+
+    async with AsyncSession(concurrent_engine) as session:
+        balance = await read_balance(session, user.id)
+        total, count = (
+            await session.execute(
+                select(func.coalesce(func.sum(Transaction.value), 0), func.count()).where(
+                    Transaction.user_id == user.id
+                )
+            )
+        ).one()
+    assert balance['balance'] == total
+    assert sum(state.count for state in balance['states']) == count
+    assert count == len(ids) // 3
@@ -1,8 +1,18 @@
+import asyncio
 from http import HTTPStatus
+from time import perf_counter
 
+import pytest
 from jwt import decode
 
-from src.app.controllers.security import create_access_token
+from src.app.controllers.security import (
+    create_access_token,
+    get_password_hash,
+    pdw_context,
+    principal_cache,
+    verify_password,
+)
+from src.app.models.models import Transaction
 
 
 def test_jwt(token, settings):
@@ -37,3 +47,102 @@ def test_current_no_user(client, token):
     )
     assert response.status_code == HTTPStatus.UNAUTHORIZED
     assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+@pytest.mark.asyncio
+async def test_current_user_cost_independent_of_transactions(
+    session, client, user, token, count_queries
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    principal_cache.clear()
+    with count_queries() as without_transactions:
+        client.post('/auth/refresh_token', headers=headers)
+
+    session.add_all([
+        Transaction(
+            title=f'{i}', description='desc', state='feita', value=1, user_id=user.id
+        )
+        for i in range(200)
+    ])
+    await session.commit()
+
+    principal_cache.clear()
+    with count_queries() as with_transactions:
+        client.post('/auth/refresh_token', headers=headers)
+
+    assert len(with_transactions) == len(without_transactions)
+    assert not any('transactions' in query for query in with_transactions)
+
+
+def test_current_user_is_cached(client, user, token, count_queries):
+    headers = {'Authorization': f'Bearer {token}'}
+    principal_cache.clear()
+
+    with count_queries() as first_request:
+        client.post('/auth/refresh_token', headers=headers)
+    with count_queries() as second_request:
+        response = client.post('/auth/refresh_token', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(first_request) == 1
+    assert second_request == []
+    assert principal_cache.hits == 1
+    assert principal_cache.misses == 1
+
+
+def test_update_user_invalidates_cached_user(client, user, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post('/auth/refresh_token', headers=headers)
+    assert principal_cache.backend.get(user.email)
+
+    client.put(
+        f'/users/{user.id}',
+        headers=headers,
+        json={'username': 'novo', 'email': 'novo@example.com', 'password': 'novo'},
+    )
+
+    assert principal_cache.backend.get(user.email) is None
+    response = client.post('/auth/refresh_token', headers=headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_delete_user_invalidates_cached_user(client, user, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post('/auth/refresh_token', headers=headers)
+
+    client.delete(f'/users/{user.id}', headers=headers)
+
+    assert principal_cache.backend.get(user.email) is None
+    response = client.post('/auth/refresh_token', headers=headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_password_hash_and_verify():
+    hashed = await get_password_hash('senha')
+
+    assert await verify_password('senha', hashed)
+    assert not await verify_password('outra', hashed)
+
+
+@pytest.mark.asyncio
+async def test_login_storm_does_not_block_event_loop():
+    start = perf_counter()
+    pdw_context.hash('senha')
+    blocking_hash_time = perf_counter() - start
+
+    delays = []
+
+    async def unrelated_request():
+        while True:
+            start = perf_counter()
+            await asyncio.sleep(0)
+            delays.append(perf_counter() - start)
+
+    heartbeat = asyncio.create_task(unrelated_request())
+    await asyncio.gather(*(get_password_hash('senha') for _ in range(16)))
+    heartbeat.cancel()
+
+    delays.sort()
+    p99 = delays[int(len(delays) * 0.99)]
+    assert p99 < blocking_hash_time
@@ -0,0 +1,127 @@
+from http import HTTPStatus
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+from src.app.controllers.security import create_access_token
+from src.app.controllers.tokens import TokenService
+
+
+def _pem(private_key):
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+def _public_pem(private_key):
+    return (
+        private_key.public_key()
+        .public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        .decode()
+    )
+
+
+@pytest.fixture(scope='module')
+def rsa_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+@pytest.mark.parametrize(
+    ('algorithm', 'make_key'),
+    [
+        ('RS256', lambda: rsa.generate_private_key(public_exponent=65537, key_size=2048)),
+        ('EdDSA', ed25519.Ed25519PrivateKey.generate),
+    ],
+)
+def test_asymmetric_tokens(algorithm, make_key):
+    private_key = make_key()
+    service = TokenService(algorithm, _pem(private_key), 'k1', expire_minutes=5)
+
+    token = service.encode({'sub': 'a@test.com', 'uid': 1})
+
+    assert jwt.get_unverified_header(token)['kid'] == 'k1'
+    assert service.decode(token)['uid'] == 1
+    claims = jwt.decode(token, _public_pem(private_key), algorithms=[algorithm])
+    assert claims['sub'] == 'a@test.com'
+
+
+def test_rotated_keys_stay_valid(rsa_key):
+    old = TokenService('RS256', _pem(rsa_key), 'old', expire_minutes=5)
+    new_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    new = TokenService(
+        'RS256',
+        _pem(new_key),
+        'new',
+        expire_minutes=5,
+        verification_keys={'old': _public_pem(rsa_key)},
+    )
+
+    assert new.decode(old.encode({'sub': 'a@test.com'}))['sub'] == 'a@test.com'
+    with pytest.raises(jwt.PyJWTError):
+        old.decode(new.encode({'sub': 'a@test.com'}))
+
+
+def test_unknown_key_ids_are_rejected(rsa_key):
+    service = TokenService('RS256', _pem(rsa_key), 'k1', expire_minutes=5)
+    token = jwt.encode(
+        {'sub': 'a@test.com'}, rsa_key, algorithm='RS256', headers={'kid': 'other'}
+    )
+
+    with pytest.raises(jwt.PyJWTError, match='other'):
+        service.decode(token)
+
+
+def test_other_algorithms_are_rejected(rsa_key):
+    service = TokenService('RS256', _pem(rsa_key), 'k1', expire_minutes=5)
+    token = jwt.encode({'sub': 'a@test.com'}, 'secret', algorithm='HS256')
+
+    with pytest.raises(jwt.PyJWTError):
+        service.decode(token)
+
+
+def test_expired_tokens_are_rejected():
+    service = TokenService('HS256', 'secret', 'k1', expire_minutes=-1)
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        service.decode(service.encode({'sub': 'a@test.com'}))
+
+
+def test_login_token_carries_the_user_id(client, user, token):
+    claims = jwt.decode(token, options={'verify_signature': False})
+
+    assert claims == {'sub': user.email, 'uid': user.id, 'exp': claims['exp']}
+
+
+def test_user_id_routes_skip_the_user_lookup(client, user, token, count_queries):
+    with count_queries() as queries:
+        response = client.get(
+            '/transactions/balance', headers={'Authorization': f'Bearer {token}'}
+        )
+
+    assert response.status_code == HTTPStatus.OK
+    assert not any('FROM users' in query for query in queries)
+
+
+def test_tokens_without_user_id_fall_back_to_the_lookup(client, user):
+    token = create_access_token({'sub': user.email})
+
+    response = client.get(
+        '/transactions/balance', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_invalid_tokens_are_unauthorized(client):
+    response = client.get(
+        '/transactions/balance', headers={'Authorization': 'Bearer not-a-token'}
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
@@ -1,9 +1,18 @@
+import json
+import tracemalloc
+from datetime import datetime
+from decimal import Decimal
 from http import HTTPStatus
 
 import factory.fuzzy
 import pytest
+from freezegun import freeze_time
+from sqlalchemy import func, insert, select
 
+from src.app.controllers.exports import export_transactions
 from src.app.models.models import Transaction
+from src.app.models.schemas import TransactionList
+from src.app.routes.transactions import TRANSACTION_COLUMNS
 
 
 class TransactionFactory(factory.Factory):
@@ -18,16 +27,17 @@ class TransactionFactory(factory.Factory):
 
 
 def test_create_transaction(client, token):
-    response = client.post(
-        '/transactions',
-        headers={'Authorization': f'Bearer {token}'},
-        json={
-            'title': 'Teste titulo',
-            'description': 'Teste desc',
-            'state': 'criada',
-            'value': 500.00,
-        },
-    )
+    with freeze_time('2025-01-01 12:00:00'):
+        response = client.post(
+            '/transactions',
+            headers={'Authorization': f'Bearer {token}'},
+            json={
+                'title': 'Teste titulo',
+                'description': 'Teste desc',
+                'state': 'criada',
+                'value': 500.00,
+            },
+        )
 
     assert response.json() == {
         'id': 1,
@@ -35,6 +45,7 @@ def test_create_transaction(client, token):
         'description': 'Teste desc',
         'state': 'criada',
         'value': 500.00,
+        'occurred_at': '2025-01-01T12:00:00',
     }
 
 
@@ -150,6 +161,46 @@ async def test_patch_transaction(session, client, user, token):
     assert response.json()['title'] == 'teste!'
 
 
+@pytest.mark.asyncio
+async def test_patch_transaction_is_a_single_statement(
+    session, client, user, token, count_queries
+):
+    session.add(TransactionFactory(user_id=user.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+    # the first request loads the user into the principal cache
+    client.patch('/transactions/1', json={'title': 'teste'}, headers=headers)
+
+    with count_queries() as queries:
+        response = client.patch(
+            '/transactions/1', json={'title': 'teste!'}, headers=headers
+        )
+
+    assert response.json()['title'] == 'teste!'
+    assert len(queries) == 1
+    assert queries[0].startswith('UPDATE transactions')
+    assert 'transactions.user_id = ' in queries[0]
+    assert 'RETURNING' in queries[0]
+
+
+@pytest.mark.asyncio
+async def test_patch_transaction_of_another_user(session, client, other_user, token):
+    transaction = TransactionFactory(user_id=other_user.id, title='alheia')
+    session.add(transaction)
+    await session.commit()
+
+    for body in ({'title': 'minha'}, {'state': 'minha'}, {}):
+        response = client.patch(
+            f'/transactions/{transaction.id}',
+            json=body,
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    await session.refresh(transaction)
+    assert transaction.title == 'alheia'
+
+
 def test_delete_error(client, token):
     response = client.delete(
         '/transactions/10',
@@ -171,3 +222,756 @@ async def test_delete_transaction(session, client, user, token):
     )
     assert response.status_code == HTTPStatus.OK
     assert response.json() == {'message': 'Transaction has been delete successfully'}
+
+
+@pytest.mark.asyncio
+async def test_list_transactions_cursor_pagination(session, client, user, token):
+    session.add_all(TransactionFactory.create_batch(5, user_id=user.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    first_page = client.get('/transactions/?limit=2', headers=headers).json()
+    second_page = client.get(
+        f'/transactions/?limit=2&cursor={first_page["next_cursor"]}', headers=headers
+    ).json()
+    last_page = client.get(
+        f'/transactions/?limit=2&cursor={second_page["next_cursor"]}', headers=headers
+    ).json()
+
+    ids = [
+        transaction['id']
+        for page in (first_page, second_page, last_page)
+        for transaction in page['transactions']
+    ]
+    assert ids == [1, 2, 3, 4, 5]
+    assert last_page['next_cursor'] is None
+
+
+@pytest.mark.asyncio
+async def test_list_transactions_cursor_uses_keyset(
+    session, client, user, token, count_queries
+):
+    session.add_all(TransactionFactory.create_batch(5, user_id=user.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+    cursor = client.get('/transactions/?limit=2', headers=headers).json()['next_cursor']
+
+    with count_queries() as queries:
+        client.get(f'/transactions/?limit=2&cursor={cursor}', headers=headers)
+
+    assert any('transactions.id >' in query for query in queries)
+
+
+def test_list_transactions_invalid_cursor(client, token):
+    response = client.get(
+        '/transactions/?cursor=invalido',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid cursor'}
+
+
+@pytest.mark.parametrize('query', ['limit=0', 'limit=-1', 'limit=1001', 'offset=-1'])
+def test_list_transactions_rejects_out_of_range_pages(client, token, query):
+    response = client.get(
+        f'/transactions/?{query}', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_list_transactions_search(session, client, user, other_user, token):
+    session.add_all([
+        TransactionFactory(user_id=user.id, title='Mercado Extra', description='a'),
+        TransactionFactory(user_id=user.id, title='Aluguel', description='mercadorias'),
+        TransactionFactory(user_id=user.id, title='Cinema', description='lazer'),
+        TransactionFactory(user_id=other_user.id, title='Mercado', description='outro'),
+    ])
+    await session.commit()
+
+    response = client.get(
+        '/transactions/?search=MERCADO',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    titles = [transaction['title'] for transaction in response.json()['transactions']]
+    assert titles == ['Mercado Extra', 'Aluguel']
+
+
+@pytest.mark.asyncio
+async def test_list_transactions_search_escapes_wildcards(session, client, user, token):
+    session.add_all([
+        TransactionFactory(user_id=user.id, title='100% pago', description='a'),
+        TransactionFactory(user_id=user.id, title='1000 pago', description='b'),
+    ])
+    await session.commit()
+
+    response = client.get(
+        '/transactions/?search=0%',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    titles = [transaction['title'] for transaction in response.json()['transactions']]
+    assert titles == ['100% pago']
+
+
+def test_bulk_import_transactions(client, token):
+    response = client.post(
+        '/transactions/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[
+            {'title': 'a', 'description': 'a', 'state': 'feita', 'value': 10},
+            {'title': 'b', 'description': 'b', 'state': 'feita'},
+            {'title': 'c', 'description': 'c', 'state': 'feita', 'value': 30},
+        ],
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    data = response.json()
+    assert data['created'] == 2  # noqa: PLR2004
+    assert data['ids'] == [1, 2]
+    assert data['errors'] == [
+        {
+            'index': 1,
+            'detail': [{'type': 'missing', 'loc': ['value'], 'msg': 'Field required'}],
+        }
+    ]
+
+
+def test_bulk_import_transactions_ndjson(client, token):
+    lines = [
+        '{"title": "a", "description": "a", "state": "feita", "value": 10}',
+        'not json',
+        '{"title": "c", "description": "c", "state": "feita", "value": 30}',
+        '',
+    ]
+
+    response = client.post(
+        '/transactions/bulk',
+        headers={
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'application/x-ndjson',
+        },
+        content='\n'.join(lines),
+    )
+
+    data = response.json()
+    assert data['ids'] == [1, 2]
+    assert [error['index'] for error in data['errors']] == [1]
+
+    response = client.get('/transactions/', headers={'Authorization': f'Bearer {token}'})
+    assert [t['title'] for t in response.json()['transactions']] == ['a', 'c']
+
+
+def test_bulk_import_transactions_in_batches(client, token, count_queries, monkeypatch):
+    monkeypatch.setattr('src.app.routes.transactions.settings.IMPORT_BATCH_SIZE', 2)
+    rows = [
+        {'title': f'{i}', 'description': 'd', 'state': 'feita', 'value': i}
+        for i in range(5)
+    ]
+
+    with count_queries() as queries:
+        response = client.post(
+            '/transactions/bulk',
+            headers={'Authorization': f'Bearer {token}'},
+            json=rows,
+        )
+
+    assert response.json()['created'] == len(rows)
+    inserts = [q for q in queries if q.startswith('INSERT INTO transactions ')]
+    assert len(inserts) == 3  # noqa: PLR2004
+
+
+def test_bulk_import_transactions_expects_array(client, token):
+    response = client.post(
+        '/transactions/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'title': 'a'},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Expected a JSON array'}
+
+
+@pytest.mark.usefixtures('background_session')
+def test_import_csv_statement(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    statement = (
+        'title,description,state,value\n'
+        'Mercado,Compra,debito,-50.5\n'
+        'Salario,Empresa,credito,sem valor\n'
+        'Aluguel,Casa,debito,-1200\n'
+    )
+
+    response = client.post(
+        '/transactions/import?format=csv', headers=headers, content=statement
+    )
+
+    assert response.status_code == HTTPStatus.ACCEPTED
+    job = client.get(f'/transactions/import/{response.json()["id"]}', headers=headers)
+    assert job.json()['status'] == 'done'
+    assert job.json()['processed'] == 3  # noqa: PLR2004
+    assert job.json()['created'] == 2  # noqa: PLR2004
+    assert [error['index'] for error in job.json()['errors']] == [1]
+
+    response = client.get('/transactions/', headers=headers)
+    assert [t['value'] for t in response.json()['transactions']] == [-50.5, -1200]
+
+
+@pytest.mark.usefixtures('background_session')
+def test_import_statement_caps_stored_errors(client, token, monkeypatch):
+    monkeypatch.setattr('src.app.routes.transactions.settings.IMPORT_MAX_ERRORS', 2)
+    headers = {'Authorization': f'Bearer {token}'}
+    statement = 'title,description,state,value\n' + 'Mercado,Compra,debito,x\n' * 50
+
+    response = client.post(
+        '/transactions/import?format=csv', headers=headers, content=statement
+    )
+
+    job = client.get(f'/transactions/import/{response.json()["id"]}', headers=headers)
+    assert job.json()['status'] == 'done'
+    assert job.json()['error_count'] == 50  # noqa: PLR2004
+    assert [error['index'] for error in job.json()['errors']] == [0, 1]
+
+
+@pytest.mark.usefixtures('background_session')
+def test_import_ofx_statement(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    statement = (
+        '<OFX><STMTTRN><TRNTYPE>DEBIT<TRNAMT>-50.00<NAME>Mercado<MEMO>Compra'
+        '</STMTTRN></OFX>'
+    )
+
+    response = client.post(
+        '/transactions/import?format=ofx', headers=headers, content=statement
+    )
+
+    job = client.get(f'/transactions/import/{response.json()["id"]}', headers=headers)
+    assert job.json()['created'] == 1
+    response = client.get('/transactions/', headers=headers)
+    assert response.json()['transactions'][0]['title'] == 'Mercado'
+
+
+def test_read_import_job_not_found(client, token):
+    response = client.get(
+        '/transactions/import/unknown', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'Not Found'}
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('background_session')
+async def test_export_transactions_ndjson(session, client, user, other_user, token):
+    session.add_all(TransactionFactory.create_batch(3, user_id=user.id, title='minha'))
+    session.add(TransactionFactory(user_id=other_user.id, title='outra'))
+    await session.commit()
+
+    response = client.get(
+        '/transactions/export', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row['id'] for row in rows] == [1, 2, 3]
+    assert {row['title'] for row in rows} == {'minha'}
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('background_session')
+async def test_export_transactions_csv(session, client, user, token):
+    session.add(
+        TransactionFactory(
+            user_id=user.id,
+            title='Mercado',
+            description='a, b',
+            state='feita',
+            value=10,
+            occurred_at=datetime(2025, 1, 1, 12),
+        )
+    )
+    await session.commit()
+
+    response = client.get(
+        '/transactions/export?format=csv', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.headers['content-type'].startswith('text/csv')
+    assert response.text.splitlines() == [
+        'id,title,description,state,value,occurred_at',
+        '1,Mercado,"a, b",feita,10.00,2025-01-01 12:00:00',
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('background_session')
+async def test_export_transactions_csv_with_locale(session, client, user, token):
+    session.add(
+        TransactionFactory(
+            user_id=user.id,
+            title='Mercado',
+            description='Compra',
+            state='feita',
+            value=Decimal('-1234.5'),
+            occurred_at=datetime(2025, 1, 1, 12),
+        )
+    )
+    await session.commit()
+
+    response = client.get(
+        '/transactions/export?format=csv&locale=pt_BR',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.text.splitlines()[1] == (
+        '1,Mercado,Compra,feita,"-1.234,50",2025-01-01 12:00:00'
+    )
+
+
+@pytest.mark.asyncio
+async def test_export_transactions_memory_is_bounded(session, user, background_session):
+    rows = 20_000
+    await session.execute(
+        insert(Transaction),
+        [
+            {
+                'title': f'Mercado {i}',
+                'description': 'Compra de supermercado',
+                'state': 'feita',
+                'value': i,
+                'user_id': user.id,
+            }
+            for i in range(rows)
+        ],
+    )
+    await session.commit()
+    session.expunge_all()
+
+    exported = 0
+    tracemalloc.start()
+    async for chunk in export_transactions(user.id, 'ndjson', batch_size=500):
+        exported += chunk.count('\n')
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert exported == rows
+    assert peak < 2 * 1024 * 1024
+
+
+@pytest.mark.asyncio
+async def test_summary_transactions(session, client, user, other_user, token):
+    session.add_all([
+        TransactionFactory(user_id=user.id, state='feita', value=1000),
+        TransactionFactory(user_id=user.id, state='feita', value=-200),
+        TransactionFactory(user_id=user.id, state='pendente', value=-300),
+        TransactionFactory(user_id=other_user.id, state='feita', value=5000),
+    ])
+    await session.commit()
+
+    response = client.get(
+        '/transactions/summary', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.json() == {
+        'count': 3,
+        'total': 500.0,
+        'income': 1000.0,
+        'expense': -500.0,
+        'min': -300.0,
+        'max': 1000.0,
+        'avg': 166.67,
+        'states': [
+            {
+                'state': 'feita',
+                'count': 2,
+                'total': 800.0,
+                'income': 1000.0,
+                'expense': -200.0,
+                'min': -200.0,
+                'max': 1000.0,
+                'avg': 400.0,
+            },
+            {
+                'state': 'pendente',
+                'count': 1,
+                'total': -300.0,
+                'income': 0.0,
+                'expense': -300.0,
+                'min': -300.0,
+                'max': -300.0,
+                'avg': -300.0,
+            },
+        ],
+    }
+
+
+def test_summary_transactions_empty(client, token, count_queries):
+    with count_queries() as queries:
+        response = client.get(
+            '/transactions/summary', headers={'Authorization': f'Bearer {token}'}
+        )
+
+    assert len([query for query in queries if 'transactions' in query]) == 1
+
+    assert response.json() == {
+        'count': 0,
+        'total': 0.0,
+        'income': 0.0,
+        'expense': 0.0,
+        'min': None,
+        'max': None,
+        'avg': None,
+        'states': [],
+    }
+
+
+def _create(client, token, value, occurred_at):
+    return client.post(
+        '/transactions',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'title': 'Mercado',
+            'description': 'Compra',
+            'state': 'feita',
+            'value': value,
+            'occurred_at': occurred_at,
+        },
+    ).json()
+
+
+def test_report_transactions_by_month(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    _create(client, token, 1000, '2025-01-05T10:00:00')
+    _create(client, token, -200, '2025-01-20T10:00:00')
+    _create(client, token, -50, '2025-02-01T10:00:00')
+
+    response = client.get('/transactions/report?period=month', headers=headers)
+
+    assert response.json() == {
+        'period': 'month',
+        'buckets': [
+            {
+                'bucket': '2025-01-01',
+                'count': 2,
+                'total': 800.0,
+                'income': 1000.0,
+                'expense': -200.0,
+            },
+            {
+                'bucket': '2025-02-01',
+                'count': 1,
+                'total': -50.0,
+                'income': 0.0,
+                'expense': -50.0,
+            },
+        ],
+    }
+
+
+def test_report_transactions_follows_patch_and_delete(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    moved = _create(client, token, -200, '2025-01-20T10:00:00')
+    deleted = _create(client, token, -50, '2025-01-21T10:00:00')
+
+    client.patch(
+        f'/transactions/{moved["id"]}',
+        headers=headers,
+        json={'occurred_at': '2025-03-02T10:00:00'},
+    )
+    client.delete(f'/transactions/{deleted["id"]}', headers=headers)
+
+    response = client.get(
+        '/transactions/report?period=day&start=2025-01-01&end=2025-12-31',
+        headers=headers,
+    )
+    assert [
+        (bucket['bucket'], bucket['count']) for bucket in response.json()['buckets']
+    ] == [('2025-03-02', 1)]
+
+
+def test_balance_follows_writes(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post(
+        '/transactions/bulk',
+        headers=headers,
+        json=[
+            {'title': 'a', 'description': 'a', 'state': 'feita', 'value': 1000},
+            {'title': 'b', 'description': 'b', 'state': 'feita', 'value': -300},
+            {'title': 'c', 'description': 'c', 'state': 'pendente', 'value': -50},
+        ],
+    )
+    client.patch('/transactions/2', headers=headers, json={'state': 'pendente'})
+    client.delete('/transactions/3', headers=headers)
+
+    response = client.get('/transactions/balance', headers=headers)
+
+    assert response.json() == {
+        'balance': 700.0,
+        'states': [
+            {'state': 'feita', 'balance': 1000.0, 'count': 1},
+            {'state': 'pendente', 'balance': -300.0, 'count': 1},
+        ],
+    }
+
+
+def test_summary_transactions_is_exact(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post(
+        '/transactions/bulk',
+        headers=headers,
+        json=[
+            {'title': 'a', 'description': 'a', 'state': 'feita', 'value': 0.1}
+            for _ in range(10)
+        ],
+    )
+
+    response = client.get('/transactions/summary', headers=headers)
+
+    assert response.json()['total'] == 1.0  # noqa: PLR2004
+
+
+def test_create_transaction_rejects_fractions_of_cents(client, token):
+    response = client.post(
+        '/transactions',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'title': 'a', 'description': 'a', 'state': 'feita', 'value': 10.555},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.parametrize('value', [1e18, -1e18, 10_000_000_000])
+def test_create_transaction_rejects_amounts_too_large_to_store(client, token, value):
+    response = client.post(
+        '/transactions',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'title': 'a', 'description': 'a', 'state': 'feita', 'value': value},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_create_transaction_accepts_the_largest_amount(client, token):
+    response = client.post(
+        '/transactions',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'title': 'a',
+            'description': 'a',
+            'state': 'feita',
+            'value': 9_999_999_999.99,
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['value'] == 9_999_999_999.99  # noqa: PLR2004
+
+
+def _bulk_create(client, headers, count, **fields):
+    transaction = {'title': 'a', 'description': 'a', 'state': 'feita', 'value': 10}
+    client.post(
+        '/transactions/bulk',
+        headers=headers,
+        json=[transaction | fields for _ in range(count)],
+    )
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_transactions_by_ids(session, client, other_user, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    _bulk_create(client, headers, 3)
+    session.add(TransactionFactory(user_id=other_user.id))
+    await session.commit()
+
+    response = client.post(
+        '/transactions/bulk/delete', headers=headers, json={'ids': [1, 2, 4]}
+    )
+
+    assert response.json() == {'affected': 2}
+    assert await session.scalar(select(func.count()).select_from(Transaction)) == 2  # noqa: PLR2004
+    balance = client.get('/transactions/balance', headers=headers).json()
+    assert balance['states'] == [{'state': 'feita', 'balance': 10.0, 'count': 1}]
+
+
+def test_bulk_delete_transactions_by_filter(client, token, count_queries):
+    headers = {'Authorization': f'Bearer {token}'}
+    _bulk_create(client, headers, 20, title='importado errado')
+    _bulk_create(client, headers, 20, title='mercado')
+
+    with count_queries() as bulk_queries:
+        response = client.post(
+            '/transactions/bulk/delete', headers=headers, json={'search': 'errado'}
+        )
+    with count_queries() as loop_queries:
+        for transaction_id in range(21, 41):
+            client.delete(f'/transactions/{transaction_id}', headers=headers)
+
+    assert response.json() == {'affected': 20}
+    # one DELETE plus the rollup and balance upserts, whatever the row count, the
+    # same three statements each single delete needs
+    assert len(bulk_queries) == 3  # noqa: PLR2004
+    assert len(loop_queries) == 20 * len(bulk_queries)
+
+
+def test_bulk_delete_transactions_in_batches(client, token, count_queries, monkeypatch):
+    monkeypatch.setattr('src.app.routes.transactions.settings.BULK_BATCH_SIZE', 2)
+    headers = {'Authorization': f'Bearer {token}'}
+    _bulk_create(client, headers, 5, title='importado errado')
+    _bulk_create(client, headers, 1, title='mercado')
+
+    with count_queries() as queries:
+        response = client.post(
+            '/transactions/bulk/delete', headers=headers, json={'search': 'errado'}
+        )
+
+    assert response.json() == {'affected': 5}
+    deletes = [query for query in queries if query.startswith('DELETE')]
+    assert len(deletes) == 3  # noqa: PLR2004
+    balance = client.get('/transactions/balance', headers=headers).json()
+    assert balance['states'] == [{'state': 'feita', 'balance': 10.0, 'count': 1}]
+
+
+def test_bulk_update_transactions_is_a_single_statement(client, token, count_queries):
+    headers = {'Authorization': f'Bearer {token}'}
+    _bulk_create(client, headers, 5, title='mercado')
+    _bulk_create(client, headers, 5, title='posto')
+
+    with count_queries() as queries:
+        response = client.patch(
+            '/transactions/bulk',
+            headers=headers,
+            json={
+                'selection': {'title': 'posto'},
+                'changes': {'description': 'gasolina'},
+            },
+        )
+
+    assert response.json() == {'affected': 5}
+    assert len(queries) == 1
+    assert 'RETURNING' not in queries[0]
+    listed = client.get('/transactions/?description=gasolina', headers=headers).json()
+    assert {t['title'] for t in listed['transactions']} == {'posto'}
+
+
+def test_bulk_update_transactions_moves_balances(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    _bulk_create(client, headers, 4)
+
+    response = client.patch(
+        '/transactions/bulk',
+        headers=headers,
+        json={'selection': {'ids': [1, 2, 3]}, 'changes': {'state': 'pendente'}},
+    )
+
+    assert response.json() == {'affected': 3}
+    balance = client.get('/transactions/balance', headers=headers).json()
+    assert balance['states'] == [
+        {'state': 'feita', 'balance': 10.0, 'count': 1},
+        {'state': 'pendente', 'balance': 30.0, 'count': 3},
+    ]
+
+
+def test_bulk_update_transactions_walks_the_selection_in_batches(
+    client, token, count_queries, monkeypatch
+):
+    monkeypatch.setattr('src.app.routes.transactions.settings.BULK_BATCH_SIZE', 2)
+    headers = {'Authorization': f'Bearer {token}'}
+    _bulk_create(client, headers, 5)
+
+    with count_queries() as queries:
+        response = client.patch(
+            '/transactions/bulk',
+            headers=headers,
+            json={'selection': {'state': 'feita'}, 'changes': {'state': 'pendente'}},
+        )
+
+    assert response.json() == {'affected': 5}
+    # a SELECT per batch of 2, plus one empty SELECT ending the walk
+    selects = [query for query in queries if query.startswith('SELECT')]
+    assert len(selects) == 4  # noqa: PLR2004
+    balance = client.get('/transactions/balance', headers=headers).json()
+    assert balance['states'] == [{'state': 'pendente', 'balance': 50.0, 'count': 5}]
+
+
+@pytest.mark.parametrize(
+    ('method', 'path', 'body'),
+    [
+        ('post', '/transactions/bulk/delete', {}),
+        ('patch', '/transactions/bulk', {'selection': {}, 'changes': {'title': 'a'}}),
+        ('patch', '/transactions/bulk', {'selection': {'ids': [1]}, 'changes': {}}),
+    ],
+)
+def test_bulk_changes_need_a_selection_and_changes(client, token, method, path, body):
+    response = client.request(
+        method, path, headers={'Authorization': f'Bearer {token}'}, json=body
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_list_transactions_selects_only_public_columns(
+    session, client, user, token, count_queries
+):
+    session.add(TransactionFactory(user_id=user.id))
+    await session.commit()
+
+    with count_queries() as queries:
+        response = client.get(
+            '/transactions/', headers={'Authorization': f'Bearer {token}'}
+        )
+
+    [query] = queries
+    columns = query.split('FROM')[0]
+    assert 'transactions.user_id' not in columns
+    assert 'transactions.created_at' not in columns
+    assert response.json()['transactions'][0].keys() == {
+        'id',
+        'title',
+        'description',
+        'state',
+        'value',
+        'occurred_at',
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('rows', [1_000, 10_000])
+async def test_list_projection_is_cheaper_than_entities(session, user, rows):
+    await session.execute(
+        insert(Transaction),
+        [
+            {
+                'title': f'Mercado {i}',
+                'description': 'Compra de supermercado',
+                'state': 'feita',
+                'value': i,
+                'user_id': user.id,
+            }
+            for i in range(rows)
+        ],
+    )
+    await session.commit()
+    session.expunge_all()
+
+    async def peak_memory_per_row(query, page):
+        tracemalloc.start()
+        TransactionList.model_validate(
+            {'transactions': page((await session.execute(query)).all())},
+            from_attributes=True,
+        )
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        session.expunge_all()
+        return peak / rows
+
+    entities = await peak_memory_per_row(
+        select(Transaction), lambda page: [row[0] for row in page]
+    )
+    projection = await peak_memory_per_row(select(*TRANSACTION_COLUMNS), list)
+
+    assert projection < entities * 0.8  # noqa: PLR2004
@@ -1,5 +1,24 @@
+import asyncio
 from http import HTTPStatus
 
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.app.controllers.accounts import purge_deleted_users, purge_user
+from src.app.controllers.database import get_session
+from src.app.main import app
+from src.app.models.models import (
+    Balance,
+    Transaction,
+    TransactionRollup,
+    User,
+    utcnow,
+)
+from src.app.routes import users
+from tests.conftest import UserFactory
+
 
 def test_create_user(client):
     response = client.post(
@@ -46,10 +65,58 @@ def test_create_user_exists_username(client, user, other_user):
     assert response.json() == {'detail': 'Username already exists'}
 
 
+def test_create_user_is_a_single_insert(client, count_queries):
+    with count_queries() as queries:
+        response = client.post(
+            '/users/',
+            json={'username': 'alice', 'email': 'alice@example.com', 'password': 'a'},
+        )
+
+    assert response.status_code == HTTPStatus.CREATED
+    [query] = queries
+    assert query.startswith('INSERT INTO users')
+    assert 'ON CONFLICT DO NOTHING RETURNING' in query
+
+
+@pytest.mark.asyncio
+async def test_concurrent_signups_create_no_duplicates(concurrent_engine, session):
+    sessions = async_sessionmaker(concurrent_engine, expire_on_commit=False)
+
+    async def get_session_override():
+        async with sessions() as request_session:
+            yield request_session
+
+    app.dependency_overrides[get_session] = get_session_override
+    signups = [
+        {'username': f'user{i % 3}', 'email': f'user{i % 4}@test.com', 'password': 'a'}
+        for i in range(12)
+    ]
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url='http://test'
+        ) as client:
+            responses = await asyncio.gather(
+                *(client.post('/users/', json=signup) for signup in signups)
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    created = [r.json() for r in responses if r.status_code == HTTPStatus.CREATED]
+    conflicts = [
+        r.json()['detail'] for r in responses if r.status_code != HTTPStatus.CREATED
+    ]
+    rows = (await session.execute(select(User.username, User.email))).all()
+    assert sorted(rows) == sorted((user['username'], user['email']) for user in created)
+    assert len({username for username, _ in rows}) == len(rows)
+    assert len({email for _, email in rows}) == len(rows)
+    assert len(created) + len(conflicts) == len(signups)
+    assert set(conflicts) <= {'Username already exists', 'Email already exists'}
+
+
 def test_read_users(client):
     response = client.get('/users')
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {'users': []}
+    assert response.json() == {'users': [], 'next_cursor': None}
 
 
 def test_delete_user(client, user, token):
@@ -61,6 +128,18 @@ def test_delete_user(client, user, token):
     assert response.json() == {'message': 'User deleted'}
 
 
+def test_deleted_user_ids_are_not_reused(client, user, token):
+    client.delete(f'/users/{user.id}', headers={'Authorization': f'Bearer {token}'})
+
+    response = client.post(
+        '/users/',
+        json={'username': 'alice', 'email': 'alice@example.com', 'password': 'secret'},
+    )
+
+    # the deleted user's tokens still carry its id
+    assert response.json()['id'] > user.id
+
+
 def test_update_user(client, user, token):
     response = client.put(
         '/users/1',
@@ -136,3 +215,142 @@ def test_read_user_by_id(client, user):
     response = client.get('/users/0')
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert response.json() == {'detail': 'User not found'}
+
+
+@pytest.mark.asyncio
+async def test_read_users_cursor_pagination(session, client):
+    session.add_all(UserFactory.create_batch(5))
+    await session.commit()
+
+    first_page = client.get('/users/?limit=3').json()
+    last_page = client.get(f'/users/?limit=3&cursor={first_page["next_cursor"]}').json()
+
+    ids = [user['id'] for page in (first_page, last_page) for user in page['users']]
+    assert ids == [1, 2, 3, 4, 5]
+    assert last_page['next_cursor'] is None
+
+
+@pytest.mark.parametrize('query', ['limit=0', 'limit=-1', 'offset=-1'])
+def test_read_users_rejects_out_of_range_pages(client, query):
+    response = client.get(f'/users/?{query}')
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_read_users_selects_only_public_columns(session, client, count_queries):
+    session.add_all(UserFactory.create_batch(5))
+    await session.commit()
+    cursor = client.get('/users/?limit=2').json()['next_cursor']
+
+    with count_queries() as queries:
+        client.get(f'/users/?limit=2&cursor={cursor}')
+
+    [query] = queries
+    assert 'users.password' not in query
+    assert 'transactions' not in query
+    assert 'users.id >' in query
+    assert 'ORDER BY users.id' in query
+
+
+def _add_transactions(client, token, count):
+    client.post(
+        '/transactions/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[
+            {'title': 'a', 'description': 'a', 'state': 'feita', 'value': 1}
+            for _ in range(count)
+        ],
+    )
+
+
+async def _count(session, model):
+    return await session.scalar(select(func.count()).select_from(model))
+
+
+@pytest.mark.asyncio
+async def test_delete_user_cascades_in_the_database(
+    session, client, user, token, count_queries
+):
+    _add_transactions(client, token, 5)
+
+    with count_queries() as queries:
+        response = client.delete(
+            f'/users/{user.id}', headers={'Authorization': f'Bearer {token}'}
+        )
+
+    assert response.status_code == HTTPStatus.OK
+    assert not any('FROM transactions' in query for query in queries)
+    for model in (Transaction, TransactionRollup, Balance):
+        assert await _count(session, model) == 0
+
+
+@pytest.mark.asyncio
+async def test_delete_large_user_purges_in_the_background(
+    session, client, user, token, monkeypatch
+):
+    monkeypatch.setattr(users.settings, 'USER_PURGE_THRESHOLD', 3)
+    scheduled = []
+    monkeypatch.setattr(users, 'purge_user', lambda *args: scheduled.append(args))
+    _add_transactions(client, token, 5)
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.delete(f'/users/{user.id}', headers=headers)
+
+    assert response.status_code == HTTPStatus.ACCEPTED
+    assert response.json() == {'message': 'User deletion scheduled'}
+    assert scheduled == [(user.id, users.settings.PURGE_BATCH_SIZE)]
+    # hidden while its rows are purged
+    assert client.get(f'/users/{user.id}').status_code == HTTPStatus.NOT_FOUND
+    assert client.get('/users/').json()['users'] == []
+    assert client.post('/auth/refresh_token', headers=headers).status_code == (
+        HTTPStatus.UNAUTHORIZED
+    )
+    # the token's user id claim is not enough to write
+    for method, path, body in (
+        ('patch', '/transactions/1', {'state': 'pendente'}),
+        (
+            'patch',
+            '/transactions/bulk',
+            {'selection': {'ids': [1]}, 'changes': {'state': 'pendente'}},
+        ),
+        ('post', '/transactions/bulk/delete', {'ids': [1]}),
+        ('delete', '/transactions/1', None),
+    ):
+        response = client.request(method, path, headers=headers, json=body)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+    login = client.post(
+        '/auth/token', data={'username': user.email, 'password': user.clean_password}
+    )
+    assert login.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('background_session')
+async def test_purge_user_deletes_in_batches(session, client, user, token, count_queries):
+    _add_transactions(client, token, 5)
+
+    with count_queries() as queries:
+        await purge_user(user.id, batch_size=2)
+
+    deletes = [query for query in queries if query.startswith('DELETE FROM transactions')]
+    assert len(deletes) == 3  # noqa: PLR2004
+    assert await _count(session, Transaction) == 0
+    assert await _count(session, Balance) == 0
+    assert await _count(session, User) == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('background_session')
+async def test_purge_deleted_users_resumes_unfinished_purges(
+    session, client, user, other_user, token
+):
+    _add_transactions(client, token, 5)
+    # a purge that never ran, like one lost to a restart
+    user.deleted_at = utcnow()
+    await session.commit()
+
+    await purge_deleted_users(batch_size=2)
+
+    assert (await session.scalars(select(User.id))).all() == [other_user.id]
+    assert await _count(session, Transaction) == 0